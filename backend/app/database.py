@@ -1,6 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 import sys
 import os
 
@@ -9,13 +12,152 @@ backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, backend_dir)
 
 from config import settings
+from services.metrics import DB_COMMIT_SECONDS, timed
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def sqlite_pragmas(in_memory: bool = False) -> list:
+    """每个SQLite连接建立时执行的PRAGMA"""
+    pragmas = [
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout}",
+        f"PRAGMA cache_size={settings.sqlite_cache_size}",
+    ]
+    if not in_memory:
+        # WAL：读不阻塞写、写不阻塞读；synchronous=NORMAL 下WAL模式只在检查点时fsync
+        pragmas += [
+            f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+            f"PRAGMA synchronous={settings.sqlite_synchronous}",
+            f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        ]
+    return pragmas
+
+
+def engine_options(database_url: str) -> dict:
+    """按数据库类型选择连接参数和连接池配置"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+
+    if backend == "sqlite":
+        in_memory = url.database in (None, "", ":memory:")
+        options = {
+            # 连接级的等待锁时间，与 busy_timeout 一致
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": settings.sqlite_busy_timeout / 1000,
+            },
+        }
+        if in_memory:
+            # 内存数据库只能共享同一个连接
+            options["poolclass"] = StaticPool
+        else:
+            options.update(
+                pool_size=settings.sqlite_pool_size,
+                max_overflow=settings.sqlite_max_overflow,
+                pool_timeout=settings.db_pool_timeout,
+            )
+        return options
+
+    if backend == "postgresql":
+        return {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_recycle": settings.db_pool_recycle,
+            # 连接被服务端或中间件断开后自动重连
+            "pool_pre_ping": True,
+            "connect_args": {
+                "application_name": settings.db_application_name,
+                "options": f"-c statement_timeout={settings.db_statement_timeout}",
+            },
+        }
+
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": True,
+    }
+
+
+def async_database_url(database_url: str) -> str:
+    """把同步驱动的数据库地址换成对应的异步驱动（aiosqlite / asyncpg）"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    elif backend == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
+
+
+def _set_sqlite_pragmas_on_connect(sync_engine):
+    """SQLite连接建立时设置PRAGMA（同步引擎和异步引擎的 sync_engine 通用）"""
+    if sync_engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas(in_memory=sync_engine.url.database in (None, "", ":memory:"))
+
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def create_db_engine(database_url: str = None):
+    """根据配置创建同步数据库引擎（Celery任务、迁移和脚本使用）"""
+    database_url = database_url or settings.database_url
+    db_engine = create_engine(database_url, **engine_options(database_url))
+    _set_sqlite_pragmas_on_connect(db_engine)
+    return db_engine
+
+
+def create_async_db_engine(database_url: str = None):
+    """根据配置创建异步数据库引擎（FastAPI接口使用）"""
+    database_url = async_database_url(database_url or settings.async_database_url or settings.database_url)
+    options = engine_options(database_url)
+    if "pool_size" in options and make_url(database_url).get_backend_name() == "sqlite":
+        # aiosqlite 默认不使用连接池（NullPool），需要显式指定
+        options["poolclass"] = AsyncAdaptedQueuePool
+    if make_url(database_url).get_backend_name() == "postgresql":
+        # asyncpg 的连接参数与 psycopg2 不同：服务端参数通过 server_settings 传递
+        options["connect_args"] = {
+            "server_settings": {
+                "application_name": settings.db_application_name,
+                "statement_timeout": str(settings.db_statement_timeout),
+            }
+        }
+    db_engine = create_async_engine(database_url, **options)
+    _set_sqlite_pragmas_on_connect(db_engine.sync_engine)
+    return db_engine
+
+
+class TimedSession(Session):
+    """记录提交耗时的会话（同步会话用于Celery任务）"""
+    commit_label = "sync"
+
+    def commit(self):
+        with timed(DB_COMMIT_SECONDS, session=self.commit_label):
+            super().commit()
+
+
+class AsyncTimedSession(TimedSession):
+    """异步会话内部使用的同步会话，提交耗时单独标记"""
+    commit_label = "async"
+
+
+engine = create_db_engine()
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=TimedSession)
+
+async_engine = create_async_db_engine()
+
+# 提交后不过期对象：异步会话中访问过期属性会触发隐式IO而报错
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False, sync_session_class=AsyncTimedSession
+)
 
 Base = declarative_base()
 
@@ -27,3 +169,7 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
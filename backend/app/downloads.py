@@ -0,0 +1,241 @@
+import hashlib
+import os
+import re
+import time
+import zipfile
+import zlib
+from typing import Iterable, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+# 每次输出的块大小
+DOWNLOAD_BLOCK_SIZE = 64 * 1024
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+# 文件名中的路径分隔符（含Windows的反斜杠和驱动器冒号）
+_PATH_SEPARATORS = re.compile(r"[/\\:]")
+
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    """
+    生成Content-Disposition头：filename 为ASCII回退名，
+    filename* 按RFC 5987携带UTF-8编码的原文件名（中文标题）
+    路径分隔符在两者中都替换为下划线（与压缩包内条目命名一致），引号只在回退名中替换
+    """
+    filename = _PATH_SEPARATORS.sub("_", filename)
+    fallback = "".join(c if c.isascii() and c.isprintable() and c != '"' else "_" for c in filename)
+    value = f'{disposition}; filename="{fallback}"'
+    if fallback != filename:
+        value += f"; filename*=UTF-8''{quote(filename, safe='')}"
+    return value
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match 是否命中（弱比较，支持多个值和 *）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [value.strip() for value in header.split(",")]
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _iter_bytes(data: bytes) -> Iterator[bytes]:
+    for start in range(0, len(data), DOWNLOAD_BLOCK_SIZE):
+        yield data[start:start + DOWNLOAD_BLOCK_SIZE]
+
+
+def text_download_response(request: Request, text: str, filename: str) -> Response:
+    """
+    直接从内存中的文本输出下载，不写临时文件
+    ETag 为内容摘要，客户端带 If-None-Match 且未变化时返回304
+    """
+    data = text.encode("utf-8")
+    etag = f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Length"] = str(len(data))
+    headers["Content-Disposition"] = content_disposition(filename)
+    # text/* 类型由Starlette追加 charset=utf-8
+    return StreamingResponse(_iter_bytes(data), media_type="text/plain", headers=headers)
+
+
+def parse_range(header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析单个Range（bytes=start-end / bytes=start- / bytes=-suffix），返回 [start, end) 范围
+    不支持的格式（例如多段范围）或无效的范围（end小于start）返回None，由调用方返回完整内容；
+    起始位置超出文件大小时抛出ValueError（416）
+    """
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # 最后 suffix 个字节
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError("unsatisfiable range")
+        return max(file_size - suffix, 0), file_size
+    start = int(first)
+    if last and int(last) < start:
+        # RFC 9110：无效的范围忽略，返回完整内容
+        return None
+    if start >= file_size:
+        raise ValueError("unsatisfiable range")
+    end = min(int(last) + 1, file_size) if last else file_size
+    return start, end
+
+
+def _iter_file_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(DOWNLOAD_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def file_download_response(request: Request, path: str, filename: str, media_type: str) -> Response:
+    """
+    文件下载，支持Range（206 Partial Content）和条件请求，播放器拖动进度时只读取所需范围
+    ETag 由文件修改时间和大小生成；If-Range 与当前ETag不一致时返回完整文件
+    """
+    stat = os.stat(path)
+    file_size = stat.st_size
+    etag = f'"{stat.st_mtime_ns:x}-{file_size:x}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": content_disposition(filename),
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, file_size)
+        except ValueError:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{file_size}", **headers})
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{file_size}"
+            headers["Content-Length"] = str(end - start)
+            return StreamingResponse(
+                _iter_file_range(path, start, end), status_code=206, media_type=media_type, headers=headers
+            )
+
+    headers["Content-Length"] = str(file_size)
+    return StreamingResponse(_iter_file_range(path, 0, file_size), media_type=media_type, headers=headers)
+
+
+class _ZipOutput:
+    """
+    zipfile的输出目标：不支持seek，写入的数据暂存在缓冲区，由生成器取走后清空
+    zipfile检测到输出不可seek时改用数据描述符记录CRC和大小，无需回写本地文件头；
+    磁盘上的文件不经过zipfile写入，见 _write_stored_file
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._written = 0
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._written += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._written
+
+    def flush(self):
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        """取走缓冲区中已写入的数据"""
+        if self._buffer:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            yield data
+
+
+def _zip_info(name: str, compress_type: int) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+    info.compress_type = compress_type
+    return info
+
+
+def _write_stored_file(archive: zipfile.ZipFile, output: _ZipOutput, name: str, path: str) -> Iterator[bytes]:
+    """
+    以STORED写入磁盘上的文件：先读一遍算出CRC，本地文件头直接带上CRC和大小，不使用数据描述符
+    （不少解压工具不支持带数据描述符的STORED条目，因为无法确定数据在哪里结束）
+    zipfile对不可seek的输出总是使用数据描述符，因此条目由这里直接写出，再登记到压缩包中，
+    中央目录仍由zipfile在关闭时写入
+    """
+    with open(path, "rb") as f:
+        # 两遍读取同一个打开的文件，期间文件被替换也不影响
+        size = os.fstat(f.fileno()).st_size
+        crc = 0
+        while True:
+            block = f.read(DOWNLOAD_BLOCK_SIZE)
+            if not block:
+                break
+            crc = zlib.crc32(block, crc)
+
+        info = _zip_info(name, zipfile.ZIP_STORED)
+        info.file_size = info.compress_size = size
+        info.CRC = crc
+        info.header_offset = output.tell()
+        # 超过4GB的条目由 FileHeader 自动写入ZIP64扩展字段
+        output.write(info.FileHeader())
+        yield from output.drain()
+
+        f.seek(0)
+        copied = 0
+        copied_crc = 0
+        while True:
+            block = f.read(DOWNLOAD_BLOCK_SIZE)
+            if not block:
+                break
+            copied += len(block)
+            copied_crc = zlib.crc32(block, copied_crc)
+            output.write(block)
+            yield from output.drain()
+    if copied != size or copied_crc != crc:
+        # 文件在读取期间被原地修改，本地文件头已经发出，只能中止输出
+        raise OSError(f"{path} changed while being added to the archive")
+
+    archive.filelist.append(info)
+    archive.NameToInfo[name] = info
+    archive.start_dir = output.tell()
+
+
+def iter_zip(entries: Iterable[Tuple[str, object]]) -> Iterator[bytes]:
+    """
+    边生成边输出ZIP，内存占用只有一个读取块
+    entries 为 (压缩包内路径, 内容)：内容为str时按UTF-8写入并压缩，
+    为文件路径（pathlib.Path）时按块拷贝，MP3本身已压缩，使用STORED不再压缩
+    """
+    output = _ZipOutput()
+    with zipfile.ZipFile(output, mode="w") as archive:
+        for name, content in entries:
+            if isinstance(content, str):
+                with archive.open(_zip_info(name, zipfile.ZIP_DEFLATED), mode="w") as entry:
+                    entry.write(content.encode("utf-8"))
+                yield from output.drain()
+                continue
+
+            yield from _write_stored_file(archive, output, name, os.fspath(content))
+    # 中央目录在关闭时写入
+    yield from output.drain()
@@ -1,9 +1,17 @@
-from fastapi import FastAPI, Depends, HTTPException
+from celery import group
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
-from typing import List
+from kombu.exceptions import OperationalError as BrokerUnavailable
+from sqlalchemy import delete, func, literal, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, undefer_group
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+import base64
 import os
 import sys
 
@@ -11,13 +19,18 @@ import sys
 backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, backend_dir)
 
-from app.database import get_db, engine, Base
+from app.database import get_async_db, async_engine, AsyncSessionLocal
+from app.models import generate_uuid
+from app.downloads import content_disposition, file_download_response, iter_zip, text_download_response
 from app import models, schemas
-from tasks.celery_app import celery_app
-from tasks.tasks import process_text_task, generate_audio_task
-
-# 创建数据库表
-Base.metadata.create_all(bind=engine)
+from tasks.celery_app import celery_app, task_priority
+from config import settings
+from tasks.tasks import process_text_task, retranslate_article_task, start_audio_generation
+from services.tts_service import tts_service
+from services.events import ALL_TASKS_CHANNEL, article_channel, task_channel, iter_sse_events
+from services.progress import get_live_progress, merge_live_progress
+from services.task_counts import count_tasks
+from services.metrics import render_latest
 
 app = FastAPI(title="新闻转换平台 API", version="1.0.0")
 
@@ -36,13 +49,78 @@ os.makedirs(audio_storage_path, exist_ok=True)
 if os.path.exists(audio_storage_path):
     app.mount("/storage", StaticFiles(directory=audio_storage_path), name="storage")
 
+# 列表/状态查询只加载的列（不含正文）
+ARTICLE_SUMMARY_COLUMNS = load_only(
+    models.Article.id,
+    models.Article.task_id,
+    models.Article.title,
+    models.Article.title_cn,
+    models.Article.source_url,
+    models.Article.publish_time,
+    models.Article.author,
+    models.Article.audio_path,
+    models.Article.audio_path_original,
+    models.Article.status,
+    models.Article.translation_progress,
+    models.Article.translation_started_at,
+    models.Article.translation_completed_at,
+    models.Article.created_at,
+)
+
+ARTICLE_STATUS_COLUMNS = load_only(
+    models.Article.id,
+    models.Article.task_id,
+    models.Article.status,
+    models.Article.translation_progress,
+    models.Article.translation_started_at,
+    models.Article.translation_completed_at,
+    models.Article.audio_path,
+    models.Article.audio_path_original,
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    在线程池中执行同步的Redis/Celery调用，不阻塞事件循环
+    消息队列不可用时返回503，而不是等连接超时后报500
+    """
+    try:
+        return await run_in_threadpool(func, *args, **kwargs)
+    except BrokerUnavailable as e:
+        print(f"Message broker unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Task queue unavailable, try again later")
+
+
+async def with_live_progress(responses: list) -> list:
+    """用Redis中的实时进度覆盖数据库里的检查点进度"""
+    live = await run_blocking(get_live_progress, [response.id for response in responses])
+    for response in responses:
+        response.translation_progress = merge_live_progress(
+            response.id, response.status, response.translation_progress, live
+        )
+    return responses
+
+
+@app.on_event("shutdown")
+async def close_db_connections():
+    """关闭异步引擎的连接池（aiosqlite每个连接占用一个后台线程）"""
+    await async_engine.dispose()
+
+
 @app.get("/")
 async def root():
     return {"message": "新闻转换平台 API"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus指标（API进程；worker的指标由各worker单独导出）"""
+    content, content_type = render_latest()
+    return Response(content=content, headers={"Content-Type": content_type})
+
+
 @app.post("/api/tasks", response_model=schemas.TaskResponse)
-async def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db)):
+async def create_task(task: schemas.TaskCreate, db: AsyncSession = Depends(get_async_db)):
     """创建新任务（仅文本模式）"""
     if not task.content:
         raise HTTPException(status_code=400, detail="Content is required")
@@ -50,60 +128,218 @@ async def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db)):
     # 创建任务
     db_task = models.Task(url="text_input", status="pending")
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await db.commit()
+    await db.refresh(db_task)
     
-    # 异步执行文本处理任务
-    process_text_task.delay(db_task.id, task.title or "Untitled", task.content)
+    # 异步执行文本处理任务（短文本优先）
+    try:
+        await run_blocking(
+            process_text_task.apply_async,
+            (db_task.id, task.title or "Untitled", task.content),
+            priority=task_priority(len(task.content))
+        )
+    except HTTPException:
+        await mark_tasks_not_queued(db, [db_task])
+        raise
     
     # 转换字段名从id到task_id
     return schemas.TaskResponse.from_orm(db_task)
 
 
+async def mark_tasks_not_queued(db: AsyncSession, db_tasks: list):
+    """入队失败的任务标记为失败，避免一直停留在pending"""
+    for db_task in db_tasks:
+        db_task.status = "failed"
+        db_task.error_message = "Task queue unavailable"
+    await db.commit()
+
+
+@app.post("/api/tasks/batch", response_model=schemas.TaskBatchResponse)
+async def create_task_batch(batch: schemas.TaskBatchCreate, db: AsyncSession = Depends(get_async_db)):
+    """批量创建任务（仅文本模式）
+    
+    所有任务在一个事务中写入，每篇文章作为独立的Celery任务分发（失败时各自重试），
+    worker进程内翻译模型只加载一次、跨任务复用；批量任务使用低优先级，不阻塞交互提交
+    """
+    if len(batch.articles) > settings.batch_max_articles:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_articles} articles per batch")
+    if any(not item.content for item in batch.articles):
+        raise HTTPException(status_code=400, detail="Content is required")
+    
+    batch_id = generate_uuid()
+    db_tasks = [models.Task(url="text_input", status="pending", batch_id=batch_id) for _ in batch.articles]
+    db.add_all(db_tasks)
+    await db.commit()
+    
+    task_args = [
+        (db_task.id, item.title or "Untitled", item.content)
+        for db_task, item in zip(db_tasks, batch.articles)
+    ]
+    batch_group = group(process_text_task.s(*args) for args in task_args)
+    try:
+        await run_blocking(batch_group.apply_async, priority=settings.task_priority_bulk)
+    except HTTPException:
+        await mark_tasks_not_queued(db, db_tasks)
+        raise
+    
+    return {
+        "batch_id": batch_id,
+        "task_ids": [task_id for task_id, _, _ in task_args],
+        "total": len(task_args)
+    }
+
+
+@app.get("/api/tasks/batch/{batch_id}", response_model=schemas.TaskBatchStatusResponse)
+async def get_task_batch(batch_id: str, db: AsyncSession = Depends(get_async_db)):
+    """获取批次汇总状态"""
+    result = await db.execute(
+        select(models.Task.status, func.count(models.Task.id))
+        .where(models.Task.batch_id == batch_id)
+        .group_by(models.Task.status)
+    )
+    rows = result.all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    status_counts = {status: count for status, count in rows}
+    total = sum(status_counts.values())
+    completed = status_counts.get("completed", 0)
+    failed = status_counts.get("failed", 0)
+    return {
+        "batch_id": batch_id,
+        "total": total,
+        "status_counts": status_counts,
+        "completed": completed,
+        "failed": failed,
+        "finished": completed + failed == total
+    }
+
+
 @app.get("/api/tasks/{task_id}", response_model=schemas.TaskResponse)
-async def get_task(task_id: str, db: Session = Depends(get_db)):
+async def get_task(task_id: str, db: AsyncSession = Depends(get_async_db)):
     """获取任务状态"""
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
+    task = await db.get(models.Task, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return schemas.TaskResponse.from_orm(task)
 
 
+def encode_task_cursor(created_at: datetime, task_id: str) -> str:
+    """把分页位置 (created_at, id) 编码为不透明的游标字符串"""
+    raw = f"{created_at.isoformat()}|{task_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_task_cursor(cursor: str):
+    """解析游标，返回 (created_at, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at_raw, task_id = raw.rsplit("|", 1)
+        created_at = datetime.fromisoformat(created_at_raw)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return created_at, task_id
+
+
 @app.get("/api/tasks", response_model=schemas.TaskListResponse)
-async def get_tasks(skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
-    """获取任务列表"""
-    tasks = db.query(models.Task).offset(skip).limit(limit).all()
-    total = db.query(models.Task).count()
+async def get_tasks(
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """获取任务列表（按创建时间倒序）
+    
+    Args:
+        skip: 偏移量分页（兼容旧接口），提供cursor时忽略
+        limit: 每页条数
+        cursor: 上一页返回的next_cursor，用于游标分页
+        status: 按任务状态过滤
+    """
+    limit = max(1, min(limit, settings.task_list_max_limit))
+    
+    query = select(models.Task)
+    if status:
+        query = query.where(models.Task.status == status)
+    if cursor:
+        # 按 (created_at, id) 行值比较，参数使用列本身的类型绑定
+        cursor_created_at, cursor_id = decode_task_cursor(cursor)
+        query = query.where(tuple_(models.Task.created_at, models.Task.id) < tuple_(
+            literal(cursor_created_at, models.Task.created_at.type),
+            literal(cursor_id, models.Task.id.type)
+        ))
+    query = query.order_by(models.Task.created_at.desc(), models.Task.id.desc())
+    if not cursor and skip:
+        query = query.offset(skip)
+    
+    # 多取一条判断是否还有下一页
+    tasks = (await db.scalars(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = encode_task_cursor(tasks[-1].created_at, tasks[-1].id)
+    
     return {
-        "tasks": [schemas.TaskResponse.from_orm(t) for t in tasks],
-        "total": total,
-        "page": skip // limit + 1,
-        "page_size": limit
+        "tasks": [schemas.TaskResponse.from_orm(task) for task in tasks],
+        "total": await count_tasks(db, status),
+        "page": None if cursor else skip // limit + 1,
+        "page_size": limit,
+        "next_cursor": next_cursor
     }
 
 
 @app.get("/api/tasks/{task_id}/articles", response_model=schemas.ArticleListResponse)
-async def get_task_articles(task_id: str, db: Session = Depends(get_db)):
-    """获取任务下的文章列表"""
-    articles = db.query(models.Article).filter(models.Article.task_id == task_id).all()
-    # 转换为响应模型
-    article_responses = [schemas.ArticleResponse.from_orm(article) for article in articles]
-    return {"articles": article_responses}
+async def get_task_articles(task_id: str, include_content: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """获取任务下的文章列表
+    
+    Args:
+        task_id: 任务ID
+        include_content: 是否返回正文和译文，默认只返回摘要字段
+    """
+    if include_content:
+        articles = (await db.scalars(
+            select(models.Article)
+            .options(undefer_group("body"))
+            .where(models.Article.task_id == task_id)
+            .order_by(models.Article.created_at)
+        )).all()
+        article_responses = []
+        for article in articles:
+            response = schemas.ArticleResponse.from_orm(article)
+            response.has_content = article.content is not None
+            response.has_translation = article.content_cn is not None
+            article_responses.append(response)
+    else:
+        # 摘要模式：正文是否存在通过 IS NOT NULL 判断，不读取正文内容
+        rows = (await db.execute(
+            select(
+                models.Article,
+                models.Article.content.isnot(None).label("has_content"),
+                models.Article.content_cn.isnot(None).label("has_translation"),
+            )
+            .options(ARTICLE_SUMMARY_COLUMNS)
+            .where(models.Article.task_id == task_id)
+            .order_by(models.Article.created_at)
+        )).all()
+        article_responses = [
+            schemas.ArticleResponse.from_summary(article, has_content, has_translation)
+            for article, has_content, has_translation in rows
+        ]
+    return {"articles": await with_live_progress(article_responses)}
 
 
 @app.delete("/api/tasks/all")
-async def delete_all_tasks(db: Session = Depends(get_db)):
+async def delete_all_tasks(db: AsyncSession = Depends(get_async_db)):
     """清空所有任务和文章"""
     try:
         # 先删除所有文章（因为有外键约束）
-        articles_count = db.query(models.Article).count()
-        db.query(models.Article).delete()
+        articles_count = (await db.execute(delete(models.Article))).rowcount
         
         # 再删除所有任务
-        tasks_count = db.query(models.Task).count()
-        db.query(models.Task).delete()
+        tasks_count = (await db.execute(delete(models.Task))).rowcount
         
-        db.commit()
+        await db.commit()
         
         return {
             "message": "All tasks and articles deleted successfully",
@@ -111,71 +347,122 @@ async def delete_all_tasks(db: Session = Depends(get_db)):
             "deleted_articles": articles_count
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting tasks: {str(e)}")
 
 
 @app.get("/api/articles/{article_id}", response_model=schemas.ArticleDetailResponse)
-async def get_article(article_id: str, db: Session = Depends(get_db)):
+async def get_article(article_id: str, db: AsyncSession = Depends(get_async_db)):
     """获取文章详情"""
-    article = db.query(models.Article).filter(models.Article.id == article_id).first()
+    article = await db.get(models.Article, article_id, options=[undefer_group("body")])
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return (await with_live_progress([schemas.ArticleDetailResponse.model_validate(article)]))[0]
+
+
+@app.put("/api/articles/{article_id}")
+async def update_article(article_id: str, article_update: schemas.ArticleUpdate, db: AsyncSession = Depends(get_async_db)):
+    """更新文章内容（例如通讯稿的更正版本）
+    
+    只重新翻译改变的行，已有音频随后重新生成，未改变的段落复用原音频
+    入队前先把文章状态条件更新为翻译中，并发的更新请求只有一个能入队，其余返回409
+    """
+    if not article_update.content:
+        raise HTTPException(status_code=400, detail="Content is required")
+    article = (await db.execute(
+        select(models.Article.title, models.Article.status, models.Article.translation_progress)
+        .where(models.Article.id == article_id)
+    )).first()
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
-    return article
+    
+    # 比较后更新：状态仍是刚读到的值（且不在翻译/生成中）时才改为翻译中
+    claimed = (await db.execute(
+        update(models.Article)
+        .where(
+            models.Article.id == article_id,
+            models.Article.status.is_not_distinct_from(article.status),
+            models.Article.status.not_in(["translating", "generating"]),
+        )
+        .values(status="translating", translation_progress=0)
+        .execution_options(synchronize_session=False)
+    )).rowcount
+    await db.commit()
+    if not claimed:
+        current = await db.scalar(select(models.Article.status).where(models.Article.id == article_id))
+        raise HTTPException(status_code=409, detail=f"Article is {current}, try again later")
+    
+    try:
+        await run_blocking(
+            retranslate_article_task.apply_async,
+            (article_id, article_update.title or article.title, article_update.content),
+            {"previous_status": article.status},
+            priority=task_priority(len(article_update.content))
+        )
+    except HTTPException:
+        # 未能入队，恢复原状态，否则文章会一直停留在翻译中
+        await db.execute(
+            update(models.Article)
+            .where(models.Article.id == article_id, models.Article.status == "translating")
+            .values(status=article.status, translation_progress=article.translation_progress)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        raise
+    return {"message": "Article update accepted", "article_id": article_id}
+
+
+@app.get("/api/articles/{article_id}/status", response_model=schemas.ArticleStatusResponse)
+async def get_article_status(article_id: str, db: AsyncSession = Depends(get_async_db)):
+    """获取文章状态和进度（不含正文，用于轮询）"""
+    article = await db.scalar(
+        select(models.Article).options(ARTICLE_STATUS_COLUMNS).where(models.Article.id == article_id)
+    )
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return (await with_live_progress([schemas.ArticleStatusResponse.model_validate(article)]))[0]
 
 
 @app.get("/api/articles/{article_id}/download/original")
-async def download_original(article_id: str, db: Session = Depends(get_db)):
+async def download_original(article_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
     """下载原文"""
-    article = db.query(models.Article).filter(models.Article.id == article_id).first()
+    article = await db.get(models.Article, article_id, options=[undefer_group("body")])
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
     
-    # 创建临时文件
-    import tempfile
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as f:
-        f.write(f"{article.title}\n\n{article.content}")
-        temp_path = f.name
-    
-    return FileResponse(
-        temp_path,
-        media_type='text/plain',
+    return text_download_response(
+        request,
+        f"{article.title}\n\n{article.content}",
         filename=f"{article.title[:50]}_original.txt"
     )
 
 
 @app.get("/api/articles/{article_id}/download/translated")
-async def download_translated(article_id: str, db: Session = Depends(get_db)):
+async def download_translated(article_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
     """下载译文"""
-    article = db.query(models.Article).filter(models.Article.id == article_id).first()
+    article = await db.get(models.Article, article_id, options=[undefer_group("body")])
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
     
     if not article.content_cn:
         raise HTTPException(status_code=400, detail="Translated content not available")
     
-    # 创建临时文件
-    import tempfile
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as f:
-        f.write(f"{article.title_cn or article.title}\n\n{article.content_cn}")
-        temp_path = f.name
-    
-    return FileResponse(
-        temp_path,
-        media_type='text/plain',
+    return text_download_response(
+        request,
+        f"{article.title_cn or article.title}\n\n{article.content_cn}",
         filename=f"{article.title_cn or article.title}_translated.txt"
     )
 
 
 @app.post("/api/articles/{article_id}/generate-audio")
-async def generate_audio(article_id: str, text_type: str = "translated", db: Session = Depends(get_db)):
+async def generate_audio(article_id: str, text_type: str = "translated", db: AsyncSession = Depends(get_async_db)):
     """生成文章音频
     
     Args:
         article_id: 文章ID
         text_type: 文本类型，'original' 或 'translated'（默认）
     """
-    article = db.query(models.Article).filter(models.Article.id == article_id).first()
+    article = await db.get(models.Article, article_id, options=[undefer_group("body")])
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
     
@@ -191,21 +478,38 @@ async def generate_audio(article_id: str, text_type: str = "translated", db: Ses
     if text_type == "original" and article.audio_path_original and os.path.exists(article.audio_path_original):
         return {"message": "Audio already exists", "audio_path": article.audio_path_original}
     
-    # 异步生成音频
-    generate_audio_task.delay(article_id, text_type)
+    # 单飞：已有进行中的生成任务时不重复入队，返回该任务及当前进度
+    job_id, started = await run_blocking(
+        start_audio_generation, article_id, text_type, priority=settings.task_priority_interactive
+    )
+    if not started:
+        live = await run_blocking(get_live_progress, [article_id])
+        return {
+            "message": f"Audio generation already in progress for {text_type} text",
+            "job_id": job_id,
+            "status": article.status,
+            "translation_progress": merge_live_progress(article_id, article.status, article.translation_progress, live)
+        }
     
-    return {"message": f"Audio generation started for {text_type} text"}
+    return {"message": f"Audio generation started for {text_type} text", "job_id": job_id}
 
 
 @app.get("/api/articles/{article_id}/download/audio")
-async def download_audio(article_id: str, text_type: str = "translated", db: Session = Depends(get_db)):
-    """下载音频
+async def download_audio(
+    article_id: str,
+    request: Request,
+    text_type: str = "translated",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """下载音频（支持Range请求，播放器可直接拖动进度）
     
     Args:
         article_id: 文章ID
         text_type: 文本类型，'original' 或 'translated'（默认）
     """
-    article = db.query(models.Article).filter(models.Article.id == article_id).first()
+    article = await db.scalar(
+        select(models.Article).options(ARTICLE_SUMMARY_COLUMNS).where(models.Article.id == article_id)
+    )
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
     
@@ -228,13 +532,168 @@ async def download_audio(article_id: str, text_type: str = "translated", db: Ses
     
     suffix = "_original" if text_type == "original" else ""
     
-    return FileResponse(
+    return file_download_response(
+        request,
         audio_path,
+        filename=f"{safe_filename}{suffix}.mp3",
+        media_type='audio/mpeg'
+    )
+
+
+def safe_entry_name(title: str) -> str:
+    """压缩包内目录名：去掉路径分隔符等特殊字符，保留中文"""
+    name = "".join(c for c in (title or "") if c.isalnum() or c in (' ', '-', '_')).strip()
+    return name[:50] or "article"
+
+
+def article_zip_entries(articles: list):
+    """按文章生成压缩包条目：原文、译文、原文音频、译文音频（存在时）"""
+    for index, article in enumerate(articles, start=1):
+        folder = f"{index:03d}_{safe_entry_name(article.title_cn or article.title)}"
+        yield f"{folder}/original.txt", f"{article.title}\n\n{article.content}"
+        if article.content_cn:
+            yield f"{folder}/translated.txt", f"{article.title_cn or article.title}\n\n{article.content_cn}"
+        if article.audio_path_original and os.path.exists(article.audio_path_original):
+            yield f"{folder}/audio_original.mp3", Path(article.audio_path_original)
+        if article.audio_path and os.path.exists(article.audio_path):
+            yield f"{folder}/audio_translated.mp3", Path(article.audio_path)
+
+
+@app.post("/api/articles/batch-download")
+async def batch_download(download: schemas.BatchDownloadRequest, db: AsyncSession = Depends(get_async_db)):
+    """打包下载多篇文章（原文、译文和音频）
+    
+    一次查询取出所有文章，压缩包边生成边输出，不在内存或磁盘中拼出完整文件；
+    MP3使用STORED条目，文本使用DEFLATE压缩
+    """
+    if download.format != "zip":
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {download.format}")
+    article_ids = list(dict.fromkeys(download.article_ids))
+    if not article_ids:
+        raise HTTPException(status_code=400, detail="article_ids is required")
+    if len(article_ids) > settings.batch_download_max_articles:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.batch_download_max_articles} articles per download"
+        )
+    
+    articles = (await db.scalars(
+        select(models.Article)
+        .options(undefer_group("body"))
+        .where(models.Article.id.in_(article_ids))
+    )).all()
+    if not articles:
+        raise HTTPException(status_code=404, detail="Articles not found")
+    # 按请求中的顺序排列
+    order = {article_id: index for index, article_id in enumerate(article_ids)}
+    articles = sorted(articles, key=lambda article: order[article.id])
+    
+    filename = f"articles_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        iter_zip(article_zip_entries(articles)),
+        media_type="application/zip",
+        headers={"Content-Disposition": content_disposition(filename)}
+    )
+
+
+@app.get("/api/articles/{article_id}/stream/audio")
+async def stream_audio(article_id: str, text_type: str = "translated", db: AsyncSession = Depends(get_async_db)):
+    """边生成边播放音频
+    
+    按顺序以分块传输输出已合成完成的段落，生成完成后等同于完整音频
+    
+    Args:
+        article_id: 文章ID
+        text_type: 文本类型，'original' 或 'translated'（默认）
+    """
+    article = await db.scalar(
+        select(models.Article).options(ARTICLE_SUMMARY_COLUMNS).where(models.Article.id == article_id)
+    )
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+    
+    suffix = "_original" if text_type == "original" else ""
+    audio_id = f"{article_id}{suffix}"
+    audio_path = article.audio_path_original if text_type == "original" else article.audio_path
+    
+    manifest = await run_in_threadpool(tts_service.read_manifest, audio_id)
+    if manifest is None and not (audio_path and os.path.exists(audio_path)):
+        raise HTTPException(status_code=404, detail=f"{text_type} audio generation not started")
+    
+    return StreamingResponse(
+        tts_service.stream_audio(audio_id),
         media_type='audio/mpeg',
-        filename=f"{safe_filename}{suffix}.mp3"
+        headers={"Cache-Control": "no-cache"}
     )
 
 
+def article_event_snapshot(article: models.Article, live: dict) -> dict:
+    """文章状态快照（不含正文），作为事件流的第一条消息"""
+    return {
+        "type": "article",
+        "id": article.id,
+        "task_id": article.task_id,
+        "status": article.status,
+        "translation_progress": merge_live_progress(
+            article.id, article.status, article.translation_progress, live
+        ),
+        "audio_path": article.audio_path,
+        "audio_path_original": article.audio_path_original,
+    }
+
+
+def sse_response(channels: List[str], snapshot: dict, request: Request) -> StreamingResponse:
+    return StreamingResponse(
+        iter_sse_events(channels, snapshot, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# 事件流接口不使用 Depends(get_async_db)：依赖的会话要到响应结束才关闭，长连接会一直占用连接池
+
+
+@app.get("/api/articles/{article_id}/events")
+async def article_events(article_id: str, request: Request):
+    """文章状态/进度事件流（Server-Sent Events）"""
+    async with AsyncSessionLocal() as db:
+        article = await db.scalar(
+            select(models.Article).options(ARTICLE_STATUS_COLUMNS).where(models.Article.id == article_id)
+        )
+        if not article:
+            raise HTTPException(status_code=404, detail="Article not found")
+        snapshot = article_event_snapshot(article, await run_blocking(get_live_progress, [article.id]))
+    return sse_response([article_channel(article_id)], snapshot, request)
+
+
+@app.get("/api/tasks/{task_id}/events")
+async def task_events(task_id: str, request: Request):
+    """任务及其文章的状态/进度事件流（Server-Sent Events）"""
+    async with AsyncSessionLocal() as db:
+        task = await db.get(models.Task, task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        articles = (await db.scalars(
+            select(models.Article)
+            .options(ARTICLE_STATUS_COLUMNS)
+            .where(models.Article.task_id == task_id)
+            .order_by(models.Article.created_at)
+        )).all()
+        live = await run_blocking(get_live_progress, [article.id for article in articles])
+        snapshot = {
+            "type": "task",
+            **schemas.TaskResponse.from_orm(task).model_dump(mode="json"),
+            "articles": [article_event_snapshot(article, live) for article in articles],
+        }
+    return sse_response([task_channel(task_id)], snapshot, request)
+
+
+@app.get("/api/events")
+async def all_task_events(request: Request):
+    """全部任务的状态事件流（Server-Sent Events），用于首页任务列表"""
+    return sse_response([ALL_TASKS_CHANNEL], {"type": "tasks"}, request)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
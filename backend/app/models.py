@@ -1,4 +1,6 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, Index
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.database import Base
 import uuid
@@ -8,6 +10,14 @@ def generate_uuid():
     return str(uuid.uuid4())
 
 
+# 任务创建时间：SQLite中 CURRENT_TIMESTAMP 写入的文本精确到秒，绑定参数也按同样格式，
+# 游标分页按时间比较时才不会因格式不同（是否带微秒）而出错；其他数据库使用原生时间类型
+CREATED_AT_TYPE = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
+
 class Task(Base):
     __tablename__ = "tasks"
     
@@ -15,9 +25,16 @@ class Task(Base):
     url = Column(String, nullable=False)
     status = Column(String, default="pending")  # pending, crawling, translating, generating, completed, failed
     articles_count = Column(Integer, default=0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(CREATED_AT_TYPE, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     error_message = Column(Text, nullable=True)
+    batch_id = Column(String, nullable=True, index=True)  # 批量提交时所属批次
+    
+    __table_args__ = (
+        # 任务列表按 (created_at, id) 倒序做游标分页
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_status_created_at_id", "status", "created_at", "id"),
+    )
 
 
 class Article(Base):
@@ -27,8 +44,9 @@ class Article(Base):
     task_id = Column(String, ForeignKey("tasks.id"), nullable=False)
     title = Column(String, nullable=False)
     title_cn = Column(String, nullable=True)
-    content = Column(Text, nullable=False)
-    content_cn = Column(Text, nullable=True)
+    # 正文延迟加载：列表和状态查询不读取正文，需要时用 undefer_group("body") 一次取出
+    content = deferred(Column(Text, nullable=False), group="body")
+    content_cn = deferred(Column(Text, nullable=True), group="body")
     source_url = Column(String, nullable=False)
     publish_time = Column(DateTime(timezone=True), nullable=True)
     author = Column(String, nullable=True)
@@ -39,6 +57,12 @@ class Article(Base):
     translation_started_at = Column(DateTime(timezone=True), nullable=True)
     translation_completed_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # 按任务查询文章（前缀覆盖 task_id 单列查询），按创建顺序返回
+        Index("ix_articles_task_id_created_at", "task_id", "created_at"),
+        Index("ix_articles_status", "status"),
+    )
 
 
 class Site(Base):
@@ -50,3 +74,13 @@ class Site(Base):
     is_favorite = Column(Integer, default=0)  # 0 or 1
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+
+class TaskCount(Base):
+    """
+    按状态的任务数，由数据库触发器在任务增删和状态变化时维护（见迁移 0004_task_counts），
+    任务列表的总数直接读取，不需要 COUNT 全表；状态为空的任务记在空字符串下
+    """
+    __tablename__ = "task_counts"
+    
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
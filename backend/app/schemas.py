@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 
@@ -8,6 +8,30 @@ class TaskCreate(BaseModel):
     content: str
 
 
+class ArticleUpdate(BaseModel):
+    title: Optional[str] = None  # 不传时沿用原标题
+    content: str
+
+
+class TaskBatchCreate(BaseModel):
+    articles: List[TaskCreate] = Field(..., min_length=1)
+
+
+class TaskBatchResponse(BaseModel):
+    batch_id: str
+    task_ids: List[str]
+    total: int
+
+
+class TaskBatchStatusResponse(BaseModel):
+    batch_id: str
+    total: int
+    status_counts: Dict[str, int]
+    completed: int
+    failed: int
+    finished: bool
+
+
 class TaskResponse(BaseModel):
     task_id: str
     url: str
@@ -16,6 +40,7 @@ class TaskResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
     error_message: Optional[str] = None
+    batch_id: Optional[str] = None
     
     @classmethod
     def from_orm(cls, obj):
@@ -27,7 +52,8 @@ class TaskResponse(BaseModel):
             articles_count=obj.articles_count,
             created_at=obj.created_at,
             updated_at=obj.updated_at,
-            error_message=obj.error_message
+            error_message=obj.error_message,
+            batch_id=obj.batch_id
         )
     
     class Config:
@@ -36,9 +62,10 @@ class TaskResponse(BaseModel):
 
 class TaskListResponse(BaseModel):
     tasks: List[TaskResponse]
-    total: int
-    page: int
+    total: int  # 缓存的总数，可能短暂滞后
+    page: Optional[int] = None  # 使用游标分页时为None
     page_size: int
+    next_cursor: Optional[str] = None  # 下一页游标，没有更多数据时为None
 
 
 class ArticleResponse(BaseModel):
@@ -58,6 +85,31 @@ class ArticleResponse(BaseModel):
     translation_started_at: Optional[datetime] = None
     translation_completed_at: Optional[datetime] = None
     created_at: datetime
+    # 摘要模式下不返回正文，用这两个字段表示正文/译文是否存在
+    has_content: Optional[bool] = None
+    has_translation: Optional[bool] = None
+    
+    @classmethod
+    def from_summary(cls, obj, has_content: bool, has_translation: bool):
+        """从只加载了摘要列的ORM对象创建响应对象（不访问正文，避免触发延迟加载）"""
+        return cls(
+            id=obj.id,
+            task_id=obj.task_id,
+            title=obj.title,
+            title_cn=obj.title_cn,
+            source_url=obj.source_url,
+            publish_time=obj.publish_time,
+            author=obj.author,
+            audio_path=obj.audio_path,
+            audio_path_original=obj.audio_path_original,
+            status=obj.status,
+            translation_progress=obj.translation_progress,
+            translation_started_at=obj.translation_started_at,
+            translation_completed_at=obj.translation_completed_at,
+            created_at=obj.created_at,
+            has_content=bool(has_content),
+            has_translation=bool(has_translation)
+        )
     
     class Config:
         from_attributes = True
@@ -67,6 +119,20 @@ class ArticleListResponse(BaseModel):
     articles: List[ArticleResponse]
 
 
+class ArticleStatusResponse(BaseModel):
+    id: str
+    task_id: str
+    status: str
+    translation_progress: Optional[int] = 0
+    translation_started_at: Optional[datetime] = None
+    translation_completed_at: Optional[datetime] = None
+    audio_path: Optional[str] = None
+    audio_path_original: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class ArticleDetailResponse(BaseModel):
     id: str
     task_id: str
@@ -0,0 +1,334 @@
+"""
+翻译 -> 语音合成流水线基准测试
+
+用本地的确定性替身代替翻译模型和gTTS（延迟可配置），在Celery eager模式下
+直接执行 process_text_task / generate_audio_task，不需要网络和Redis
+在独立的工作目录中建库（alembic upgrade head），按给定的大小分布生成合成文章，输出：
+吞吐（文章/分钟、字符/秒）、各阶段 p50/p95/p99、峰值RSS、数据库写入次数，结果为JSON，便于对比
+
+用法（在backend目录下）：
+    python -m benchmarks.pipeline
+    python -m benchmarks.pipeline --articles 100 --sizes 500,3000,12000 --output result.json
+    python -m benchmarks.pipeline --translate-latency-ms 5 --tts-latency-ms 50 --baseline result.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+
+# 添加backend目录到路径
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+_WORDS = (
+    "the market report shows that energy prices rose again while central banks kept rates "
+    "steady and analysts expect growth to slow in the coming quarter as exporters face new "
+    "tariffs and consumers spend less on travel housing and technology"
+).split()
+
+# 替身合成器输出的MP3帧头：MPEG2 Layer III，24kHz，32kbps，单声道
+_STUB_FRAME_HEADER = bytes([0xFF, 0xF3, 0x44, 0xC0])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="翻译->语音合成流水线基准测试")
+    parser.add_argument("--workdir", default="./storage/bench/pipeline", help="工作目录（会被重建）")
+    parser.add_argument("--articles", type=int, default=40, help="文章数")
+    parser.add_argument("--sizes", default="500,2000,8000,20000", help="文章正文字符数，按顺序轮流使用")
+    parser.add_argument("--seed", type=int, default=42, help="生成语料的随机种子")
+    parser.add_argument("--translate-latency-ms", type=float, default=2.0, help="替身翻译每次调用的固定延迟")
+    parser.add_argument("--translate-ms-per-kchar", type=float, default=5.0, help="替身翻译每千字符的延迟")
+    parser.add_argument("--tts-latency-ms", type=float, default=20.0, help="替身合成每个chunk的固定延迟")
+    parser.add_argument("--tts-ms-per-kchar", type=float, default=10.0, help="替身合成每千字符的延迟")
+    parser.add_argument("--translation-cache", action="store_true", help="启用片段翻译缓存（默认关闭，每篇都真正翻译）")
+    parser.add_argument("--skip-audio", action="store_true", help="只测翻译阶段")
+    parser.add_argument("--output", help="结果JSON写入的文件（默认只打印）")
+    parser.add_argument("--baseline", help="上一次结果的JSON文件，打印对比")
+    return parser.parse_args()
+
+
+def build_corpus(args):
+    """生成合成文章：[(标题, 正文)]，段落之间空行分隔，句子长度随机"""
+    rng = random.Random(args.seed)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    corpus = []
+    for i in range(args.articles):
+        target = sizes[i % len(sizes)]
+        paragraphs = []
+        length = 0
+        while length < target:
+            sentences = []
+            for _ in range(rng.randint(2, 6)):
+                words = [rng.choice(_WORDS) for _ in range(rng.randint(6, 20))]
+                sentences.append(" ".join(words).capitalize() + ".")
+            paragraph = " ".join(sentences)
+            paragraphs.append(paragraph)
+            length += len(paragraph) + 2
+        corpus.append((f"Benchmark article {i}", "\n\n".join(paragraphs)[:target].rstrip() + "."))
+    return corpus
+
+
+class StubTranslation:
+    """替身翻译：按行输出确定性的结果（行数与输入一致），延迟 = 固定延迟 + 按字符数的延迟"""
+
+    def __init__(self, latency_ms: float, ms_per_kchar: float):
+        self.latency_ms = latency_ms
+        self.ms_per_kchar = ms_per_kchar
+        self.calls = 0
+        self.chars = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text: str) -> str:
+        with self._lock:
+            self.calls += 1
+            self.chars += len(text)
+        time.sleep((self.latency_ms + len(text) / 1000 * self.ms_per_kchar) / 1000)
+        return "\n".join(f"【译】{line}" if line.strip() else line for line in text.split("\n"))
+
+
+class StubSynthesizer:
+    """替身语音合成：输出时长与文本长度成正比的静音MP3（可被帧拼接），延迟可配置"""
+
+    voice = "stub"
+
+    def __init__(self, latency_ms: float, ms_per_kchar: float):
+        self.latency_ms = latency_ms
+        self.ms_per_kchar = ms_per_kchar
+        self.calls = 0
+        self.chars = 0
+        self._lock = threading.Lock()
+
+    def synthesize(self, text: str, lang: str, output_path: str):
+        from services.mp3_utils import parse_frame_header, silence_frames
+
+        with self._lock:
+            self.calls += 1
+            self.chars += len(text)
+        time.sleep((self.latency_ms + len(text) / 1000 * self.ms_per_kchar) / 1000)
+        # 约每字符60毫秒
+        data = silence_frames(parse_frame_header(_STUB_FRAME_HEADER), max(len(text), 1) * 60)
+        with open(output_path, "wb") as f:
+            f.write(data)
+
+
+class WriteCounter:
+    """统计数据库写语句（INSERT/UPDATE/DELETE）和提交次数"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.statements = {"insert": 0, "update": 0, "delete": 0}
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(None, 1)[0].lower()
+        if verb in self.statements:
+            self.statements[verb] += 1
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+    def snapshot(self) -> dict:
+        return {**self.statements, "total": sum(self.statements.values()), "commits": self.commits}
+
+
+def percentiles(values) -> dict:
+    """最近秩法计算 p50/p95/p99（毫秒）"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] * 1000
+
+    return {
+        "count": len(ordered),
+        "p50_ms": round(rank(50), 2),
+        "p95_ms": round(rank(95), 2),
+        "p99_ms": round(rank(99), 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+        "total_s": round(sum(ordered), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    """进程峰值RSS（Linux上ru_maxrss单位为KB，macOS为字节）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return round(peak / 1024 / 1024, 1)
+    return round(peak / 1024, 1)
+
+
+def prepare_environment(args, workdir):
+    """在工作目录中建库并配置：各存储路径都落在工作目录内，事件推送不连接Redis"""
+    if os.path.exists(workdir):
+        shutil.rmtree(workdir)
+    os.makedirs(workdir)
+    # 存储路径按相对路径配置，切换到工作目录后全部落在其中
+    os.chdir(workdir)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["TRANSLATION_CACHE_ENABLED"] = "true" if args.translation_cache else "false"
+    os.environ["TRANSLATION_BATCHED"] = "true"
+    # 替身翻译在当前进程内，不使用进程池
+    os.environ["TRANSLATION_PARALLEL"] = "false"
+    os.environ["TRANSLATION_PRELOAD"] = "false"
+    os.environ["TASK_MAX_RETRIES"] = "0"
+
+    from alembic import command
+    from alembic.config import Config
+
+    alembic_cfg = Config(os.path.join(backend_dir, "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", os.path.join(backend_dir, "migrations"))
+    command.upgrade(alembic_cfg, "head")
+
+    from services import audio_jobs, events, progress
+
+    # 不连接Redis：事件直接丢弃，实时进度和音频生成锁使用进程内存储
+    events._publish = lambda channels, payload: None
+    progress._redis = lambda: None
+    audio_jobs._redis = lambda: None
+
+    from tasks.celery_app import celery_app
+
+    celery_app.conf.task_always_eager = True
+    celery_app.conf.task_eager_propagates = True
+
+
+def run(args, corpus):
+    from app import models
+    from app.database import SessionLocal, engine
+    from services.translation_service import translation_service
+    from services.tts_service import tts_service
+    from tasks.tasks import generate_audio_task, process_text_task
+
+    translator = StubTranslation(args.translate_latency_ms, args.translate_ms_per_kchar)
+    translation_service._ensure_ready = lambda: None
+    translation_service._get_translation = lambda source_lang_code: translator
+    translation_service._get_model_version = lambda source_lang_code: "stub"
+    synthesizer = StubSynthesizer(args.tts_latency_ms, args.tts_ms_per_kchar)
+    tts_service.synthesizer = synthesizer
+
+    counter = WriteCounter(engine)
+    stages = {"translate": [], "audio": [], "article": []}
+    failures = 0
+    total_chars = 0
+
+    began = time.perf_counter()
+    for i, (title, content) in enumerate(corpus):
+        task_id = f"bench-task-{i:06d}"
+        db = SessionLocal()
+        try:
+            db.add(models.Task(id=task_id, url="text_input", status="pending"))
+            db.commit()
+        finally:
+            db.close()
+
+        article_began = time.perf_counter()
+        result = process_text_task.apply(args=(task_id, title, content)).result
+        stages["translate"].append(time.perf_counter() - article_began)
+        if result.get("status") != "completed":
+            failures += 1
+            continue
+
+        if not args.skip_audio:
+            db = SessionLocal()
+            try:
+                article_id = db.query(models.Article.id).filter(models.Article.task_id == task_id).scalar()
+            finally:
+                db.close()
+            audio_began = time.perf_counter()
+            result = generate_audio_task.apply(args=(article_id, "translated")).result
+            stages["audio"].append(time.perf_counter() - audio_began)
+            if result.get("status") != "completed":
+                failures += 1
+                continue
+
+        stages["article"].append(time.perf_counter() - article_began)
+        total_chars += len(title) + len(content)
+    elapsed = time.perf_counter() - began
+
+    completed = len(stages["article"])
+    return {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "articles": len(corpus),
+        "completed": completed,
+        "failed": failures,
+        "elapsed_s": round(elapsed, 3),
+        "throughput": {
+            "articles_per_min": round(completed / elapsed * 60, 2) if elapsed else 0.0,
+            "chars_per_sec": round(total_chars / elapsed, 1) if elapsed else 0.0,
+        },
+        "stages": {name: percentiles(values) for name, values in stages.items() if values},
+        "peak_rss_mb": peak_rss_mb(),
+        "db_writes": counter.snapshot(),
+        "stubs": {
+            "translate_calls": translator.calls,
+            "translate_chars": translator.chars,
+            "tts_calls": synthesizer.calls,
+            "tts_chars": synthesizer.chars,
+        },
+        "audio_chunk_store": tts_service.chunk_store.stats(),
+    }
+
+
+def compare(result, baseline):
+    """打印与上一次结果的主要指标对比"""
+    rows = [("articles/min", ("throughput", "articles_per_min")), ("chars/sec", ("throughput", "chars_per_sec"))]
+    for stage in result["stages"]:
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            rows.append((f"{stage} {metric}", ("stages", stage, metric)))
+    rows += [("peak RSS MB", ("peak_rss_mb",)), ("DB writes", ("db_writes", "total"))]
+
+    def lookup(data, path):
+        for part in path:
+            if not isinstance(data, dict) or part not in data:
+                return None
+            data = data[part]
+        return data
+
+    print()
+    print(f"{'metric':<24}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, path in rows:
+        old, new = lookup(baseline, path), lookup(result, path)
+        if old is None or new is None:
+            continue
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{name:<24}{old:>12}{new:>12}{change:>10}")
+
+
+def main():
+    args = parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    corpus = build_corpus(args)
+    prepare_environment(args, os.path.abspath(args.workdir))
+    print(f"Running pipeline benchmark over {len(corpus)} articles...")
+    result = run(args, corpus)
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    print(text)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if baseline is not None:
+        compare(result, baseline)
+
+
+if __name__ == "__main__":
+    main()
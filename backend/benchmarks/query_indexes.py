@@ -0,0 +1,201 @@
+"""
+索引前后热点查询耗时对比
+
+在独立的数据库中灌入测试数据（默认 1,000,000 篇文章），先停在迁移 0001（只有主键），
+测量列表/过滤查询耗时，再升级到 head（加索引）后重新测量
+
+用法（在backend目录下）：
+    python -m benchmarks.query_indexes
+    python -m benchmarks.query_indexes --articles 200000 --db ./storage/bench/bench.db
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# 添加backend目录到路径
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+TASK_STATUSES = ["pending", "translating", "completed", "completed", "completed", "failed"]
+ARTICLE_STATUSES = ["pending", "translating", "generating", "completed", "completed", "completed", "failed"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="索引前后查询耗时对比")
+    parser.add_argument("--db", default="./storage/bench/query_indexes.db", help="测试数据库文件（会被重建）")
+    parser.add_argument("--articles", type=int, default=1_000_000, help="文章数")
+    parser.add_argument("--articles-per-task", type=int, default=20, help="每个任务的文章数")
+    parser.add_argument("--content-size", type=int, default=200, help="每篇正文字符数")
+    parser.add_argument("--repeat", type=int, default=20, help="每个查询重复次数")
+    return parser.parse_args()
+
+
+def seed(engine, args):
+    """批量写入任务和文章，created_at 均匀分布在过去一年内"""
+    from sqlalchemy import text
+
+    task_count = max(1, args.articles // args.articles_per_task)
+    start = datetime(2025, 1, 1)
+    step = timedelta(seconds=365 * 24 * 3600 / task_count)
+    body = "x" * args.content_size
+    rng = random.Random(42)
+
+    print(f"Seeding {task_count} tasks / {args.articles} articles...")
+    began = time.perf_counter()
+    with engine.begin() as conn:
+        batch = []
+        for i in range(task_count):
+            created_at = (start + step * i).strftime("%Y-%m-%d %H:%M:%S")
+            batch.append({"id": f"task-{i:08d}", "status": rng.choice(TASK_STATUSES), "created_at": created_at})
+            if len(batch) >= 10000:
+                conn.execute(text(
+                    "INSERT INTO tasks (id, url, status, articles_count, created_at) "
+                    "VALUES (:id, 'text_input', :status, 0, :created_at)"
+                ), batch)
+                batch = []
+        if batch:
+            conn.execute(text(
+                "INSERT INTO tasks (id, url, status, articles_count, created_at) "
+                "VALUES (:id, 'text_input', :status, 0, :created_at)"
+            ), batch)
+
+        batch = []
+        for i in range(args.articles):
+            task_index = i % task_count
+            created_at = (start + step * task_index).strftime("%Y-%m-%d %H:%M:%S")
+            batch.append({
+                "id": f"article-{i:08d}",
+                "task_id": f"task-{task_index:08d}",
+                "status": rng.choice(ARTICLE_STATUSES),
+                "content": body,
+                "created_at": created_at,
+            })
+            if len(batch) >= 10000:
+                conn.execute(text(
+                    "INSERT INTO articles (id, task_id, title, content, source_url, status, translation_progress, created_at) "
+                    "VALUES (:id, :task_id, 'title', :content, 'text_input', :status, 0, :created_at)"
+                ), batch)
+                batch = []
+        if batch:
+            conn.execute(text(
+                "INSERT INTO articles (id, task_id, title, content, source_url, status, translation_progress, created_at) "
+                "VALUES (:id, :task_id, 'title', :content, 'text_input', :status, 0, :created_at)"
+            ), batch)
+    print(f"Seeded in {time.perf_counter() - began:.1f}s")
+    return task_count
+
+
+def build_queries(task_count):
+    """与接口一致的查询：(名称, SQL, 参数)"""
+    rng = random.Random(7)
+    deep_task = f"task-{task_count // 2:08d}"
+    return [
+        (
+            "task articles (get_task_articles)",
+            "SELECT id, title, status, translation_progress FROM articles "
+            "WHERE task_id = :task_id ORDER BY created_at",
+            lambda: {"task_id": f"task-{rng.randrange(task_count):08d}"},
+        ),
+        (
+            "articles by status",
+            "SELECT id FROM articles WHERE status = 'translating' LIMIT 100",
+            lambda: {},
+        ),
+        (
+            "count articles by status",
+            "SELECT COUNT(*) FROM articles WHERE status = 'failed'",
+            lambda: {},
+        ),
+        (
+            "task list first page",
+            "SELECT id, status FROM tasks ORDER BY created_at DESC, id DESC LIMIT 21",
+            lambda: {},
+        ),
+        (
+            "task list by status",
+            "SELECT id, status FROM tasks WHERE status = 'failed' "
+            "ORDER BY created_at DESC, id DESC LIMIT 21",
+            lambda: {},
+        ),
+        (
+            "task list keyset page (mid table)",
+            "SELECT id, status FROM tasks WHERE created_at < "
+            "(SELECT created_at FROM tasks WHERE id = :task_id) "
+            "ORDER BY created_at DESC, id DESC LIMIT 21",
+            lambda: {"task_id": deep_task},
+        ),
+        (
+            "task list offset page (mid table)",
+            "SELECT id, status FROM tasks ORDER BY created_at DESC, id DESC "
+            "LIMIT 21 OFFSET :offset",
+            lambda: {"offset": task_count // 2},
+        ),
+    ]
+
+
+def measure(engine, queries, repeat):
+    """每个查询执行 repeat 次，返回 {名称: (中位数ms, 最大值ms)}"""
+    from sqlalchemy import text
+
+    results = {}
+    with engine.connect() as conn:
+        for name, sql, params in queries:
+            timings = []
+            for _ in range(repeat):
+                began = time.perf_counter()
+                conn.execute(text(sql), params()).fetchall()
+                timings.append((time.perf_counter() - began) * 1000)
+            timings.sort()
+            results[name] = (timings[len(timings) // 2], timings[-1])
+    return results
+
+
+def main():
+    args = parse_args()
+    db_path = os.path.abspath(args.db)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    # 迁移脚本从 settings.database_url 读取数据库地址
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import create_engine
+
+    alembic_cfg = Config(os.path.join(backend_dir, "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", os.path.join(backend_dir, "migrations"))
+
+    command.upgrade(alembic_cfg, "0001")
+    engine = create_engine(f"sqlite:///{db_path}")
+    task_count = seed(engine, args)
+    queries = build_queries(task_count)
+
+    print("Measuring without indexes...")
+    before = measure(engine, queries, args.repeat)
+
+    began = time.perf_counter()
+    command.upgrade(alembic_cfg, "head")
+    print(f"Index migration took {time.perf_counter() - began:.1f}s")
+    engine.dispose()
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+    print("Measuring with indexes...")
+    after = measure(engine, queries, args.repeat)
+
+    print()
+    print(f"{'query':<38}{'before p50':>12}{'after p50':>12}{'speedup':>10}")
+    for name, _, _ in queries:
+        before_p50 = before[name][0]
+        after_p50 = after[name][0]
+        speedup = before_p50 / after_p50 if after_p50 else float("inf")
+        print(f"{name:<38}{before_p50:>10.2f}ms{after_p50:>10.2f}ms{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
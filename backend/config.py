@@ -5,13 +5,88 @@ from typing import Optional
 class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./news_platform.db"
+    async_database_url: Optional[str] = None  # FastAPI异步引擎地址，默认由database_url换成aiosqlite/asyncpg驱动
+    # 连接池（PostgreSQL等服务端数据库）
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0  # 等待空闲连接的超时（秒）
+    db_pool_recycle: int = 1800  # 连接最长复用时间（秒）
+    db_statement_timeout: int = 30000  # PostgreSQL单条语句超时（毫秒）
+    db_application_name: str = "news_platform"
+    # SQLite
+    sqlite_pool_size: int = 5
+    sqlite_max_overflow: int = 10
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"  # WAL模式下NORMAL仍保证数据库一致，掉电时可能丢失最后几个事务
+    sqlite_busy_timeout: int = 30000  # 等待写锁的时间（毫秒）
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # 内存映射读取的大小（字节）
+    sqlite_cache_size: int = -64000  # 页缓存大小，负数表示KiB
     
     # Redis
     redis_url: str = "redis://localhost:6379/0"
+    redis_socket_timeout: float = 2.0  # 连接/读写超时（秒），Redis不可用时快速失败
+    
+    # 推送
+    sse_heartbeat_interval: float = 15.0  # SSE心跳间隔（秒）
+    
+    # 进度
+    progress_publish_interval: float = 0.5  # 实时进度写入/推送的最小间隔（秒）
+    progress_checkpoint_step: int = 25  # 进度每增加多少写一次数据库检查点
+    progress_checkpoint_interval: float = 30.0  # 距上次检查点超过多少秒写一次数据库
+    progress_ttl: int = 3600  # Redis中实时进度的过期时间（秒）
+    progress_redis_retry_interval: float = 30.0  # Redis连接失败后多久再重试（秒）
     
     # Settings
     translation_target_language: str = "zh"
     
+    # Translation
+    translation_offline: bool = False  # 离线模式：只使用已安装的语言包
+    translation_preload: bool = True  # worker启动时检查语言包
+    translation_batched: bool = True  # 批量翻译模式
+    translation_batch_chars: int = 4000  # 每批翻译的最大字符数（缓存和检查点按批写入）
+    translation_model_batch_size: int = 32  # 每次送入翻译模型批量推理的句子数
+    translation_parallel: bool = False  # 进程池并行翻译（可选，worker需用 -P solo/threads；prefork子进程不能创建进程池，会自动回退串行）
+    translation_pool_size: int = 0  # 进程池大小，0表示使用CPU核数
+    translation_cache_enabled: bool = True  # 片段级翻译缓存
+    translation_cache_path: str = "./storage/cache/translation_cache.db"
+    translation_cache_max_entries: int = 200000
+    translation_cache_max_bytes: int = 256 * 1024 * 1024
+    
+    # 任务列表
+    task_list_max_limit: int = 100  # 单页最大条数
+    
+    # 批量提交
+    batch_max_articles: int = 500  # 单次批量提交的最大文章数
+    batch_download_max_articles: int = 200  # 单次打包下载的最大文章数
+    
+    # 任务队列优先级（0-9，数值越小越优先）
+    task_priority_interactive: int = 0  # 交互提交的短文本
+    task_priority_default: int = 3  # 交互提交的长文本、音频生成等
+    task_priority_bulk: int = 6  # 批量提交/回填
+    task_interactive_max_chars: int = 5000  # 不超过该长度的交互提交使用最高优先级
+    broker_visibility_timeout: int = 4 * 3600  # Redis消息确认前的可见超时（秒）
+    
+    # TTS
+    tts_concurrency: int = 4  # 并发合成的chunk数
+    tts_max_retries: int = 3  # 单个chunk失败后的重试次数
+    tts_retry_backoff: float = 1.0  # 重试退避基数（秒），按指数增长
+    tts_stream_poll_interval: float = 0.5  # 流式播放检查新chunk的间隔（秒）
+    tts_stream_wait_timeout: float = 120  # 流式播放等待下一个chunk的最长时间（秒）
+    tts_tld: str = "com"  # gTTS使用的Google域名（影响口音）
+    tts_slow: bool = False  # gTTS慢速朗读
+    tts_chunk_store_path: str = "./storage/audio/chunks"  # 按内容寻址的音频chunk存储
+    tts_chunk_store_max_bytes: int = 1024 * 1024 * 1024  # chunk存储总大小上限，超出后按LRU淘汰未被引用的chunk
+    audio_job_ttl: int = 3600  # 音频生成锁的过期时间（秒），生成过程中随检查点续期
+    
+    # 监控指标（Prometheus，需要安装prometheus_client）
+    metrics_enabled: bool = True
+    metrics_worker_port: int = 9101  # Celery worker导出指标的HTTP端口，0表示不启动
+    
+    # 任务重试与断点续做
+    task_max_retries: int = 3  # 翻译/音频任务失败后的重试次数
+    task_retry_backoff: float = 10.0  # 任务重试退避基数（秒），按指数增长
+    checkpoint_path: str = "./storage/checkpoints"  # 已完成片段/chunk的检查点目录
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
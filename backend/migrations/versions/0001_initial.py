@@ -0,0 +1,72 @@
+"""初始表结构
+
+已由 Base.metadata.create_all 建好表的数据库执行本迁移时跳过已存在的表，
+之后的迁移照常执行
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table("tasks"):
+        op.create_table(
+            "tasks",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("url", sa.String(), nullable=False),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("articles_count", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("error_message", sa.Text(), nullable=True),
+        )
+
+    if not _has_table("articles"):
+        op.create_table(
+            "articles",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("task_id", sa.String(), sa.ForeignKey("tasks.id"), nullable=False),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("title_cn", sa.String(), nullable=True),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("content_cn", sa.Text(), nullable=True),
+            sa.Column("source_url", sa.String(), nullable=False),
+            sa.Column("publish_time", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("author", sa.String(), nullable=True),
+            sa.Column("audio_path", sa.String(), nullable=True),
+            sa.Column("audio_path_original", sa.String(), nullable=True),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("translation_progress", sa.Integer(), nullable=True),
+            sa.Column("translation_started_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("translation_completed_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+
+    if not _has_table("sites"):
+        op.create_table(
+            "sites",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("url", sa.String(), nullable=False, unique=True),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("is_favorite", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+
+
+def downgrade():
+    op.drop_table("sites")
+    op.drop_table("articles")
+    op.drop_table("tasks")
@@ -0,0 +1,34 @@
+"""任务批次字段
+
+- tasks.batch_id：批量提交所属批次，及其索引
+
+已存在的列和索引（例如由 create_all 建好的新库，或已执行过旧版 0002 的库）跳过
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if "batch_id" not in {column["name"] for column in inspector.get_columns("tasks")}:
+        op.add_column("tasks", sa.Column("batch_id", sa.String(), nullable=True))
+
+    if "ix_tasks_batch_id" not in {index["name"] for index in inspector.get_indexes("tasks")}:
+        op.create_index("ix_tasks_batch_id", "tasks", ["batch_id"])
+
+
+def downgrade():
+    op.drop_index("ix_tasks_batch_id", table_name="tasks")
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("batch_id")
@@ -0,0 +1,45 @@
+"""热点查询索引
+
+- 任务列表：(created_at, id) 和 (status, created_at, id)，前缀同时覆盖
+  按 created_at 排序和按 status 过滤
+- 文章：(task_id, created_at) 覆盖按任务查询文章并按创建顺序返回，
+  status 单独索引用于按状态统计/过滤
+
+已存在的索引（例如由 create_all 建好的新库）跳过
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# (索引名, 表名, 列)
+INDEXES = [
+    ("ix_tasks_created_at_id", "tasks", ["created_at", "id"]),
+    ("ix_tasks_status_created_at_id", "tasks", ["status", "created_at", "id"]),
+    ("ix_articles_task_id_created_at", "articles", ["task_id", "created_at"]),
+    ("ix_articles_status", "articles", ["status"]),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = {
+        table: {index["name"] for index in inspector.get_indexes(table)}
+        for table in ("tasks", "articles")
+    }
+    for name, table, columns in INDEXES:
+        if name not in existing[table]:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
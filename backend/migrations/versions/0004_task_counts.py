@@ -0,0 +1,102 @@
+"""按状态维护的任务数
+
+- task_counts：每个状态的任务数，任务列表的总数直接读取，不需要 COUNT 全表
+- tasks 上的触发器在插入、删除和状态变化时更新 task_counts，
+  API、worker 和批量删除等所有写入路径都会被统计到
+- 状态为空的任务记在空字符串下
+
+重复执行时（例如由 create_all 建好表的库）按现有任务重新统计并重建触发器
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER tasks_count_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO task_counts (status, count) VALUES (COALESCE(NEW.status, ''), 1)
+            ON CONFLICT (status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_count_delete AFTER DELETE ON tasks BEGIN
+        UPDATE task_counts SET count = count - 1 WHERE status = COALESCE(OLD.status, '');
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_count_update AFTER UPDATE OF status ON tasks
+    WHEN COALESCE(OLD.status, '') <> COALESCE(NEW.status, '') BEGIN
+        UPDATE task_counts SET count = count - 1 WHERE status = COALESCE(OLD.status, '');
+        INSERT INTO task_counts (status, count) VALUES (COALESCE(NEW.status, ''), 1)
+            ON CONFLICT (status) DO UPDATE SET count = count + 1;
+    END
+    """,
+]
+
+POSTGRESQL_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION tasks_count_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' AND OLD.status IS NOT DISTINCT FROM NEW.status THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE task_counts SET count = count - 1 WHERE status = COALESCE(OLD.status, '');
+        END IF;
+        IF TG_OP IN ('UPDATE', 'INSERT') THEN
+            INSERT INTO task_counts (status, count) VALUES (COALESCE(NEW.status, ''), 1)
+                ON CONFLICT (status) DO UPDATE SET count = task_counts.count + 1;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tasks_count AFTER INSERT OR DELETE OR UPDATE OF status ON tasks
+    FOR EACH ROW EXECUTE FUNCTION tasks_count_trigger()
+    """,
+]
+
+
+def _drop_triggers(dialect: str):
+    if dialect == "postgresql":
+        op.execute("DROP TRIGGER IF EXISTS tasks_count ON tasks")
+        op.execute("DROP FUNCTION IF EXISTS tasks_count_trigger()")
+    else:
+        for name in ("tasks_count_insert", "tasks_count_delete", "tasks_count_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def upgrade():
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+
+    if not sa.inspect(bind).has_table("task_counts"):
+        op.create_table(
+            "task_counts",
+            sa.Column("status", sa.String(), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False),
+        )
+
+    _drop_triggers(dialect)
+    op.execute("DELETE FROM task_counts")
+    op.execute(
+        "INSERT INTO task_counts (status, count) "
+        "SELECT COALESCE(status, ''), COUNT(*) FROM tasks GROUP BY COALESCE(status, '')"
+    )
+    for statement in (POSTGRESQL_TRIGGERS if dialect == "postgresql" else SQLITE_TRIGGERS):
+        op.execute(statement)
+
+
+def downgrade():
+    _drop_triggers(op.get_bind().dialect.name)
+    op.drop_table("task_counts")
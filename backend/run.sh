@@ -5,8 +5,23 @@
 echo "启动Redis（如果未运行）..."
 redis-server --daemonize yes 2>/dev/null || echo "Redis可能已在运行"
 
+echo "执行数据库迁移..."
+alembic upgrade head
+
+echo "预加载翻译语言包和模型..."
+python -m services.translation_service || echo "语言包预加载失败，将在首次翻译时重试"
+
 echo "启动Celery Worker..."
-celery -A tasks.celery_app worker --loglevel=info --detach
+# 翻译（CPU密集）和语音合成（网络IO密集）分开部署：
+# translation 队列用prefork进程池，并发数不超过CPU核数；audio 队列用线程池，可开较高并发
+# prefork子进程的监控指标写入各自目录，由worker主进程汇总导出（翻译9101，语音9102）
+rm -rf ./storage/metrics/translation ./storage/metrics/audio
+mkdir -p ./storage/metrics/translation ./storage/metrics/audio
+PROMETHEUS_MULTIPROC_DIR=./storage/metrics/translation celery -A tasks.celery_app worker \
+    -Q translation -P prefork -c ${TRANSLATION_CONCURRENCY:-2} -n translation@%h --loglevel=info --detach
+PROMETHEUS_MULTIPROC_DIR=./storage/metrics/audio TRANSLATION_PRELOAD=false METRICS_WORKER_PORT=9102 \
+    celery -A tasks.celery_app worker \
+    -Q audio -P threads -c ${AUDIO_CONCURRENCY:-8} -n audio@%h --loglevel=info --detach
 
 echo "启动FastAPI服务器..."
 uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
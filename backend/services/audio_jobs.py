@@ -0,0 +1,196 @@
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# 添加backend目录到路径
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from config import settings
+from services.events import get_redis
+
+# 音频生成的单飞锁：每个 (文章, 文本类型) 同一时间只有一个生成任务，锁的值为持有者的Celery任务ID
+# 重复请求不再入队，而是返回正在进行的任务；任务结束（成功或最终失败）时释放
+
+# 只有持有者才能续期/释放锁（比较后操作，避免误删其他任务的锁）
+_REFRESH_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+# 释放锁，同时取出并清除重新生成标记
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) ~= ARGV[1] then
+    return nil
+end
+local rerun = redis.call('get', KEYS[2])
+redis.call('del', KEYS[1], KEYS[2])
+return rerun
+"""
+# 用新任务替换已结束（但未释放锁）的持有者
+_REPLACE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    redis.call('set', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# Redis不可用时的进程内锁（只在同一进程内生效，例如eager模式）：{key: (job_id, 过期时间)}
+_local_jobs: Dict[str, Tuple[str, float]] = {}
+_local_reruns: Dict[str, float] = {}
+_local_lock = threading.Lock()
+
+# Redis连接失败后暂停访问的截止时间
+_redis_retry_at = 0.0
+
+
+def _job_key(article_id: str, text_type: str) -> str:
+    return f"audio_job:{article_id}:{text_type}"
+
+
+def _rerun_key(article_id: str, text_type: str) -> str:
+    return f"audio_job:{article_id}:{text_type}:rerun"
+
+
+def _redis():
+    """获取可用的Redis客户端，最近连接失败过则返回None"""
+    if time.time() < _redis_retry_at:
+        return None
+    return get_redis()
+
+
+def _mark_redis_failed(e: Exception):
+    global _redis_retry_at
+    print(f"Audio job lock store unavailable, using in-process fallback: {e}")
+    _redis_retry_at = time.time() + settings.progress_redis_retry_interval
+
+
+def _decode(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _local_get(key: str) -> Optional[str]:
+    """读取进程内锁（调用方持有 _local_lock）"""
+    entry = _local_jobs.get(key)
+    if entry is None:
+        return None
+    if entry[1] < time.time():
+        del _local_jobs[key]
+        return None
+    return entry[0]
+
+
+def claim_audio_job(article_id: str, text_type: str, job_id: str) -> Optional[str]:
+    """
+    尝试成为该音频的生成任务
+    成功（或本来就是持有者，例如重试/重新投递的同一任务）时续期并返回None，
+    已被其他任务持有时返回持有者的任务ID
+    """
+    key = _job_key(article_id, text_type)
+    ttl = settings.audio_job_ttl
+    client = _redis()
+    if client is not None:
+        try:
+            if client.set(key, job_id, nx=True, ex=ttl):
+                return None
+            holder = _decode(client.get(key))
+            if holder is None:
+                # 恰好过期，再抢一次
+                return None if client.set(key, job_id, nx=True, ex=ttl) else _decode(client.get(key))
+            if holder == job_id:
+                client.expire(key, ttl)
+                return None
+            return holder
+        except Exception as e:
+            _mark_redis_failed(e)
+    with _local_lock:
+        holder = _local_get(key)
+        if holder is None or holder == job_id:
+            _local_jobs[key] = (job_id, time.time() + ttl)
+            return None
+        return holder
+
+
+def get_audio_job(article_id: str, text_type: str) -> Optional[str]:
+    """返回正在生成该音频的任务ID"""
+    key = _job_key(article_id, text_type)
+    client = _redis()
+    if client is not None:
+        try:
+            return _decode(client.get(key))
+        except Exception as e:
+            _mark_redis_failed(e)
+    with _local_lock:
+        return _local_get(key)
+
+
+def refresh_audio_job(article_id: str, text_type: str, job_id: str):
+    """生成过程中续期，避免长文本生成超过锁的过期时间"""
+    key = _job_key(article_id, text_type)
+    client = _redis()
+    if client is not None:
+        try:
+            client.eval(_REFRESH_SCRIPT, 1, key, job_id, settings.audio_job_ttl)
+            return
+        except Exception as e:
+            _mark_redis_failed(e)
+    with _local_lock:
+        if _local_get(key) == job_id:
+            _local_jobs[key] = (job_id, time.time() + settings.audio_job_ttl)
+
+
+def replace_audio_job(article_id: str, text_type: str, stale_job_id: str, job_id: str) -> bool:
+    """持有者已结束但锁未释放（例如worker被强制终止）时，由新任务接管"""
+    key = _job_key(article_id, text_type)
+    client = _redis()
+    if client is not None:
+        try:
+            return bool(client.eval(_REPLACE_SCRIPT, 1, key, stale_job_id, job_id, settings.audio_job_ttl))
+        except Exception as e:
+            _mark_redis_failed(e)
+    with _local_lock:
+        if _local_get(key) != stale_job_id:
+            return False
+        _local_jobs[key] = (job_id, time.time() + settings.audio_job_ttl)
+        return True
+
+
+def request_audio_rerun(article_id: str, text_type: str):
+    """
+    文本在生成过程中被修改：标记持有者结束后重新生成一次
+    （正在进行的任务可能已读取旧文本，不能直接复用它的结果）
+    """
+    key = _rerun_key(article_id, text_type)
+    client = _redis()
+    if client is not None:
+        try:
+            client.set(key, "1", ex=settings.audio_job_ttl)
+            return
+        except Exception as e:
+            _mark_redis_failed(e)
+    with _local_lock:
+        _local_reruns[key] = time.time() + settings.audio_job_ttl
+
+
+def release_audio_job(article_id: str, text_type: str, job_id: str) -> bool:
+    """持有者结束时释放锁，返回期间是否有重新生成的请求"""
+    key = _job_key(article_id, text_type)
+    rerun_key = _rerun_key(article_id, text_type)
+    client = _redis()
+    if client is not None:
+        try:
+            return client.eval(_RELEASE_SCRIPT, 2, key, rerun_key, job_id) is not None
+        except Exception as e:
+            _mark_redis_failed(e)
+    with _local_lock:
+        if _local_get(key) != job_id:
+            return False
+        del _local_jobs[key]
+        expires_at = _local_reruns.pop(rerun_key, None)
+        return expires_at is not None and expires_at >= time.time()
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# 添加backend目录到路径
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from config import settings
+
+
+def make_chunk_key(text: str, lang: str, voice: str) -> str:
+    """根据 (音色/语速, 语言, 文本) 计算音频chunk的内容地址"""
+    raw = '\x1f'.join([voice or '', lang, text])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def make_assembly_key(chunk_keys: List[str], gap_ms: int) -> str:
+    """合并文件的内容地址：由各chunk的key和段落间隔决定"""
+    raw = '\x1f'.join([str(gap_ms)] + list(chunk_keys))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def link_file(src: str, dst: str):
+    """
+    让dst与src共用同一份文件数据（硬链接，文件系统不支持时复制），原子替换dst
+    dst已经是src的硬链接时不做任何事
+    """
+    try:
+        if os.path.samefile(src, dst):
+            return
+    except OSError:
+        pass
+    temp_path = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(src, temp_path)
+    except OSError:
+        import shutil
+        shutil.copyfile(src, temp_path)
+    os.replace(temp_path, dst)
+
+
+class AudioChunkStore:
+    """
+    按内容寻址的音频chunk存储：文件保存为 {root}/{key前两位}/{key}.mp3，索引在SQLite中
+    相同文本（同一语言和音色）在任意文章中只合成、只存储一次
+
+    引用计数：正在生成的音频（owner）引用其用到的chunk，生成结束后释放；
+    总大小超过上限时按最近访问时间淘汰未被引用的chunk
+    另外记录每个合并文件的内容地址和路径，内容相同的文章音频以硬链接共用一份数据
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.root, "index.db")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取索引连接（fork之后的子进程重新打开连接）"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(self.root, exist_ok=True)
+            conn = sqlite3.connect(self.index_path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "key TEXT PRIMARY KEY, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_chunks_last_access ON chunks (last_access)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS refs ("
+                "owner TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (owner, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_refs_key ON refs (key)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS assemblies ("
+                "key TEXT PRIMARY KEY, path TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, offsets TEXT)"
+            )
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.mp3")
+
+    def temp_path_for(self, key: str) -> str:
+        """合成时的临时文件路径，写完后由 put 移入存储"""
+        return f"{self.path_for(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def acquire(self, owner: str, keys: Iterable[str]):
+        """owner引用这些chunk（替换owner之前的引用），被引用的chunk不会被淘汰"""
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM refs WHERE owner = ?", (owner,))
+            conn.executemany("INSERT INTO refs (owner, key) VALUES (?, ?)", [(owner, key) for key in keys])
+            conn.commit()
+
+    def release(self, owner: str):
+        """释放owner的全部引用"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM refs WHERE owner = ?", (owner,))
+            conn.commit()
+            self._evict(conn)
+
+    def lookup(self, keys: Iterable[str]) -> Dict[str, str]:
+        """返回已存储的 {key: 文件路径}，同时刷新访问时间"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = conn.execute(f"SELECT key FROM chunks WHERE key IN ({placeholders})", batch).fetchall()
+                for (key,) in rows:
+                    path = self.path_for(key)
+                    if os.path.exists(path):
+                        found[key] = path
+            if found:
+                now = time.time()
+                conn.executemany("UPDATE chunks SET last_access = ? WHERE key = ?", [(now, key) for key in found])
+                conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put(self, key: str, temp_path: str) -> str:
+        """把合成好的临时文件移入存储，返回存储路径"""
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO chunks (key, size, last_access) VALUES (?, ?, ?)",
+                (key, os.path.getsize(path), time.time())
+            )
+            conn.commit()
+            self._evict(conn)
+        return path
+
+    def _evict(self, conn: sqlite3.Connection):
+        """总大小超过上限时，按最近访问时间淘汰未被引用的chunk，淘汰到上限的90%"""
+        (total_bytes,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM chunks").fetchone()
+        if total_bytes <= self.max_bytes:
+            return
+        target_bytes = int(self.max_bytes * 0.9)
+        removed = 0
+        while total_bytes > target_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM chunks WHERE key NOT IN (SELECT key FROM refs) "
+                "ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            for key, _ in rows:
+                try:
+                    os.remove(self.path_for(key))
+                except FileNotFoundError:
+                    pass
+            conn.executemany("DELETE FROM chunks WHERE key = ?", [(key,) for key, _ in rows])
+            total_bytes -= sum(size for _, size in rows)
+            removed += len(rows)
+        conn.commit()
+        if removed:
+            print(f"Audio chunk store evicted {removed} chunks")
+
+    def find_assembly(self, key: str) -> Optional[dict]:
+        """查找内容相同的已合并文件，文件已删除或被改动时返回None"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT path, size, mtime_ns, offsets FROM assemblies WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        path, size, mtime_ns, offsets = row
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+            return None
+        return {"path": path, "offsets": json.loads(offsets) if offsets else None}
+
+    def record_assembly(self, key: str, path: str, offsets: Optional[list]):
+        """记录合并文件的内容地址"""
+        stat = os.stat(path)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO assemblies (key, path, size, mtime_ns, offsets) VALUES (?, ?, ?, ?, ?)",
+                (key, path, stat.st_size, stat.st_mtime_ns, json.dumps(offsets) if offsets is not None else None)
+            )
+            conn.commit()
+
+    def stats(self) -> dict:
+        """返回存储统计信息"""
+        with self._lock:
+            count, total_bytes = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM chunks"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "chunks": count,
+            "bytes": total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_audio_chunk_store() -> AudioChunkStore:
+    """根据配置创建音频chunk存储"""
+    return AudioChunkStore(settings.tts_chunk_store_path, settings.tts_chunk_store_max_bytes)
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+import sys
+from typing import AsyncIterator, List, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+# 添加backend目录到路径
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from config import settings
+
+# 频道命名：单篇文章 / 单个任务（含其下文章） / 全部任务
+ALL_TASKS_CHANNEL = "events:tasks"
+
+
+def article_channel(article_id: str) -> str:
+    return f"events:article:{article_id}"
+
+
+def task_channel(task_id: str) -> str:
+    return f"events:task:{task_id}"
+
+
+_redis_client = None
+
+
+def get_redis() -> redis.Redis:
+    """获取同步Redis客户端（Celery worker中发布事件用）"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(
+            settings.redis_url,
+            socket_connect_timeout=settings.redis_socket_timeout,
+            socket_timeout=settings.redis_socket_timeout,
+        )
+    return _redis_client
+
+
+def _publish(channels: List[str], payload: dict):
+    """发布事件；Redis不可用时只打印错误，不影响任务执行"""
+    message = json.dumps(payload, default=str)
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for channel in channels:
+            pipe.publish(channel, message)
+        pipe.execute()
+    except Exception as e:
+        print(f"Error publishing event: {e}")
+
+
+def publish_article_event(article_id: str, task_id: str, **fields):
+    """发布文章状态/进度事件，推送到文章频道、所属任务频道和全部任务频道"""
+    payload = {"type": "article", "id": article_id, "task_id": task_id, **fields}
+    _publish([article_channel(article_id), task_channel(task_id), ALL_TASKS_CHANNEL], payload)
+
+
+def publish_task_event(task_id: str, **fields):
+    """发布任务状态事件，同时推送到任务频道和全部任务频道"""
+    payload = {"type": "task", "id": task_id, **fields}
+    _publish([task_channel(task_id), ALL_TASKS_CHANNEL], payload)
+
+
+def format_sse(data: dict, event: Optional[str] = None) -> str:
+    """格式化为Server-Sent Events消息"""
+    message = ""
+    if event:
+        message += f"event: {event}\n"
+    message += f"data: {json.dumps(data, default=str)}\n\n"
+    return message
+
+
+async def iter_sse_events(channels: List[str], snapshot: dict, is_disconnected) -> AsyncIterator[str]:
+    """
+    订阅Redis频道并输出SSE消息流
+    先发送当前状态快照，之后转发发布的事件，空闲时定期发送心跳
+    Redis不可用时发送unavailable事件后结束，客户端回退到轮询
+    """
+    yield format_sse(snapshot, event="snapshot")
+
+    client = aioredis.from_url(settings.redis_url, socket_connect_timeout=settings.redis_socket_timeout)
+    pubsub = client.pubsub()
+    try:
+        try:
+            await pubsub.subscribe(*channels)
+        except Exception as e:
+            print(f"Error subscribing to events: {e}")
+            yield format_sse({"message": "event channel unavailable"}, event="unavailable")
+            return
+
+        while True:
+            if await is_disconnected():
+                break
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=settings.sse_heartbeat_interval
+            )
+            if message is None:
+                # 心跳，保持连接并及时发现客户端断开
+                yield ": keepalive\n\n"
+                continue
+            data = message["data"]
+            if isinstance(data, bytes):
+                data = data.decode("utf-8")
+            yield f"data: {data}\n\n"
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Event stream error: {e}")
+    finally:
+        try:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+            await client.aclose()
+        except Exception:
+            pass
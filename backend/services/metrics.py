@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Tuple
+
+# 添加backend目录到路径
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from config import settings
+
+# prometheus_client 为可选依赖，未安装或未启用时所有指标为空操作
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, multiprocess
+except ImportError:
+    prometheus_client = None
+
+# 多进程模式（uvicorn多worker、Celery prefork）：设置 PROMETHEUS_MULTIPROC_DIR 后
+# 各进程把指标写入该目录，由导出端汇总
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# 桶：单次调用耗时（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# 桶：排队等待时间（秒）
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+# 桶：翻译速度（字符/秒）
+RATE_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+
+
+class _NoopMetric:
+    """未启用指标时的替身，接口与prometheus_client的指标一致"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    @contextmanager
+    def time(self):
+        yield
+
+
+_NOOP = _NoopMetric()
+
+
+def enabled() -> bool:
+    return prometheus_client is not None and settings.metrics_enabled
+
+
+def _histogram(name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+    if not enabled():
+        return _NOOP
+    return prometheus_client.Histogram(name, documentation, labelnames, buckets=buckets)
+
+
+def _counter(name: str, documentation: str, labelnames=()):
+    if not enabled():
+        return _NOOP
+    return prometheus_client.Counter(name, documentation, labelnames)
+
+
+# 翻译：每批（串行/进程池）或每个分段（逐段模式）的耗时和速度
+TRANSLATION_BATCH_SECONDS = _histogram(
+    "translation_batch_seconds", "Latency of one translation model call", ["mode"]
+)
+TRANSLATION_CHARS_PER_SECOND = _histogram(
+    "translation_chars_per_second", "Source characters translated per second in one call", ["mode"], RATE_BUCKETS
+)
+TRANSLATION_CHARS = _counter("translation_chars", "Source characters sent to the translation model", ["mode"])
+
+# 语音合成：每个chunk的合成耗时、chunk存储命中情况、合并耗时
+TTS_CHUNK_SECONDS = _histogram("tts_chunk_seconds", "Latency of synthesizing one audio chunk (including retries)")
+TTS_CHUNK_LOOKUPS = _counter("tts_chunk_lookups", "Audio chunk store lookups", ["result"])
+TTS_MERGE_SECONDS = _histogram("tts_merge_seconds", "Time to assemble the final audio file", ["method"])
+
+# 数据库提交耗时
+DB_COMMIT_SECONDS = _histogram("db_commit_seconds", "Latency of session commits", ["session"])
+
+# Celery任务：从入队到开始执行的等待时间、执行耗时
+TASK_QUEUE_WAIT_SECONDS = _histogram(
+    "task_queue_wait_seconds", "Time from enqueue to task start", ["task"], WAIT_BUCKETS
+)
+TASK_DURATION_SECONDS = _histogram("task_duration_seconds", "Task run time", ["task", "state"])
+
+
+def observe_translation(mode: str, chars: int, seconds: float):
+    """记录一次翻译调用"""
+    TRANSLATION_BATCH_SECONDS.labels(mode=mode).observe(seconds)
+    TRANSLATION_CHARS.labels(mode=mode).inc(chars)
+    if seconds > 0:
+        TRANSLATION_CHARS_PER_SECOND.labels(mode=mode).observe(chars / seconds)
+
+
+@contextmanager
+def timed(metric, **labels):
+    """记录代码块耗时"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        (metric.labels(**labels) if labels else metric).observe(elapsed)
+
+
+def _registry():
+    """导出用的registry：多进程模式下汇总各进程写入的指标"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """生成Prometheus文本格式的指标，返回 (内容, Content-Type)"""
+    if not enabled():
+        return b"# metrics disabled or prometheus_client not installed\n", "text/plain; charset=utf-8"
+    return prometheus_client.generate_latest(_registry()), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def start_http_server(port: int) -> bool:
+    """在独立线程中启动指标HTTP服务（Celery worker用），未启用时返回False"""
+    if not enabled():
+        return False
+    prometheus_client.start_http_server(port, registry=_registry())
+    return True
+
+
+def mark_process_dead(pid: int):
+    """多进程模式下子进程退出时清理其指标文件中的实时值"""
+    if enabled() and MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
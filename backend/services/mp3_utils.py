@@ -0,0 +1,162 @@
+# MP3帧级工具：拼接时直接拷贝帧数据，不解码为PCM，内存占用与文件大小无关
+import math
+import os
+from collections import namedtuple
+from typing import List, Optional, Tuple
+
+# 每次拷贝的块大小
+COPY_BUFFER_SIZE = 64 * 1024
+
+# Layer III 比特率表（kbps），按 MPEG1 / MPEG2(2.5) 区分
+_BITRATES_V1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+_BITRATES_V2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+
+# 采样率表，key为帧头中的版本位
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG1
+    2: [22050, 24000, 16000],  # MPEG2
+    0: [11025, 12000, 8000],   # MPEG2.5
+}
+
+FrameHeader = namedtuple(
+    "FrameHeader",
+    ["raw", "version", "bitrate", "sample_rate", "channel_mode", "frame_length", "samples_per_frame"]
+)
+
+
+def parse_frame_header(data: bytes) -> Optional[FrameHeader]:
+    """解析4字节MP3帧头，仅支持Layer III，无效时返回None"""
+    if len(data) < 4 or data[0] != 0xFF or (data[1] & 0xE0) != 0xE0:
+        return None
+    version = (data[1] >> 3) & 0x03
+    layer = (data[1] >> 1) & 0x03
+    bitrate_index = data[2] >> 4
+    sample_rate_index = (data[2] >> 2) & 0x03
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    padding = (data[2] >> 1) & 0x01
+    channel_mode = data[3] >> 6
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    if version == 3:
+        bitrate = _BITRATES_V1[bitrate_index]
+        frame_length = 144 * bitrate * 1000 // sample_rate + padding
+        samples_per_frame = 1152
+    else:
+        bitrate = _BITRATES_V2[bitrate_index]
+        frame_length = 72 * bitrate * 1000 // sample_rate + padding
+        samples_per_frame = 576
+    return FrameHeader(bytes(data[:4]), version, bitrate, sample_rate, channel_mode, frame_length, samples_per_frame)
+
+
+def stream_format(header: FrameHeader) -> Tuple[int, int, int]:
+    """可以直接拼接的格式特征：(版本, 采样率, 声道模式是否单声道)"""
+    return (header.version, header.sample_rate, header.channel_mode == 3)
+
+
+def _id3v2_size(head: bytes) -> int:
+    """ID3v2标签长度（不存在时为0）"""
+    if len(head) >= 10 and head[:3] == b"ID3":
+        size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        footer = 10 if head[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def find_audio_range(path: str) -> Optional[Tuple[int, int, FrameHeader]]:
+    """
+    定位文件中音频帧数据的范围，跳过ID3v2/ID3v1标签和Xing/Info/VBRI信息帧
+    返回 (起始偏移, 结束偏移, 第一帧帧头)，无法识别时返回None
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(10)
+        start = _id3v2_size(head)
+        f.seek(start)
+        data = f.read(COPY_BUFFER_SIZE)
+
+        # 寻找第一个有效帧：要求紧随其后的位置也是有效帧头，避免误判
+        header = None
+        offset = 0
+        while offset + 4 <= len(data):
+            candidate = parse_frame_header(data[offset:offset + 4])
+            if candidate:
+                next_offset = offset + candidate.frame_length
+                if next_offset + 4 > len(data) or parse_frame_header(data[next_offset:next_offset + 4]):
+                    header = candidate
+                    break
+            offset += 1
+        if header is None:
+            return None
+        start += offset
+
+        # 第一帧是VBR信息帧时跳过
+        first_frame = data[offset:offset + header.frame_length]
+        if b"Xing" in first_frame[:64] or b"Info" in first_frame[:64] or b"VBRI" in first_frame[:64]:
+            start += header.frame_length
+
+        end = file_size
+        if file_size >= 128:
+            f.seek(file_size - 128)
+            if f.read(3) == b"TAG":
+                end -= 128
+    if end <= start:
+        return None
+    return start, end, header
+
+
+def silence_frames(header: FrameHeader, duration_ms: int) -> bytes:
+    """
+    生成与给定帧头格式相同的静音帧
+    帧头之后全部填0：side info中part2_3_length为0，解码结果即为静音
+    """
+    raw = bytearray(header.raw)
+    raw[1] |= 0x01   # 不带CRC
+    raw[2] &= ~0x02  # 不填充
+    frame = parse_frame_header(bytes(raw))
+    count = math.ceil(duration_ms / 1000 * frame.sample_rate / frame.samples_per_frame)
+    return (bytes(raw) + b"\x00" * (frame.frame_length - 4)) * count
+
+
+def copy_range(src, dst, start: int, end: int):
+    """把src文件的 [start, end) 范围分块拷贝到dst"""
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        block = src.read(min(COPY_BUFFER_SIZE, remaining))
+        if not block:
+            break
+        dst.write(block)
+        remaining -= len(block)
+
+
+def concat_mp3_files(paths: List[str], output_path: str, gap_ms: int = 500) -> Optional[List[Tuple[int, int]]]:
+    """
+    按帧直接拼接多个MP3文件，段与段之间插入gap_ms的静音帧
+    返回每个输入文件的音频数据在输出文件中的 (偏移, 长度)
+    各文件格式不一致或无法解析时返回None（不写输出），由调用方回退到解码合并
+    """
+    ranges = []
+    for path in paths:
+        audio_range = find_audio_range(path)
+        if audio_range is None:
+            return None
+        ranges.append(audio_range)
+    if not ranges:
+        return None
+
+    formats = {stream_format(header) for _, _, header in ranges}
+    if len(formats) != 1:
+        return None
+
+    offsets = []
+    temp_path = f"{output_path}.part"
+    with open(temp_path, "wb") as out:
+        for path, (start, end, header) in zip(paths, ranges):
+            with open(path, "rb") as src:
+                offsets.append((out.tell(), end - start))
+                copy_range(src, out, start, end)
+            # 静音帧沿用该段自身的帧头，与逐段输出时的字节完全一致
+            if gap_ms > 0:
+                out.write(silence_frames(header, gap_ms))
+    os.replace(temp_path, output_path)
+    return offsets
@@ -0,0 +1,152 @@
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+# 添加backend目录到路径
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from config import settings
+from services.events import get_redis, publish_article_event
+
+# Redis不可用时的进程内实时进度（只在同一进程内可见，例如eager模式）
+_local_progress: Dict[str, dict] = {}
+_local_lock = threading.Lock()
+
+# Redis连接失败后暂停访问的截止时间，避免每次进度更新都等待连接超时
+_redis_retry_at = 0.0
+
+
+def _progress_key(article_id: str) -> str:
+    return f"progress:article:{article_id}"
+
+
+def _redis():
+    """获取可用的Redis客户端，最近连接失败过则返回None"""
+    if time.time() < _redis_retry_at:
+        return None
+    return get_redis()
+
+
+def _mark_redis_failed(e: Exception):
+    global _redis_retry_at
+    print(f"Progress store unavailable, using in-process fallback: {e}")
+    _redis_retry_at = time.time() + settings.progress_redis_retry_interval
+
+
+def set_live_progress(article_id: str, state: dict):
+    """写入实时进度"""
+    client = _redis()
+    if client is not None:
+        try:
+            client.set(_progress_key(article_id), json.dumps(state), ex=settings.progress_ttl)
+            return
+        except Exception as e:
+            _mark_redis_failed(e)
+    with _local_lock:
+        _local_progress[article_id] = state
+
+
+def clear_live_progress(article_id: str):
+    """清除实时进度（终态已写入数据库后调用）"""
+    with _local_lock:
+        _local_progress.pop(article_id, None)
+    client = _redis()
+    if client is not None:
+        try:
+            client.delete(_progress_key(article_id))
+        except Exception as e:
+            _mark_redis_failed(e)
+
+
+def get_live_progress(article_ids: Iterable[str]) -> Dict[str, dict]:
+    """批量读取实时进度，返回 {article_id: {"status", "progress", "updated_at"}}"""
+    article_ids = list(article_ids)
+    if not article_ids:
+        return {}
+    result = {}
+    client = _redis()
+    if client is not None:
+        try:
+            values = client.mget([_progress_key(article_id) for article_id in article_ids])
+            for article_id, value in zip(article_ids, values):
+                if value:
+                    result[article_id] = json.loads(value)
+        except Exception as e:
+            _mark_redis_failed(e)
+    with _local_lock:
+        for article_id in article_ids:
+            if article_id not in result and article_id in _local_progress:
+                result[article_id] = _local_progress[article_id]
+    return result
+
+
+def merge_live_progress(article_id: str, status: str, progress: Optional[int], live: Dict[str, dict]) -> Optional[int]:
+    """
+    合并数据库进度与实时进度：只有实时进度对应的阶段与数据库状态一致时才采用，
+    避免终态已写入数据库、实时进度尚未清除的瞬间显示旧进度
+    """
+    state = live.get(article_id)
+    if state and state.get("status") == status:
+        return state.get("progress", progress)
+    return progress
+
+
+class ProgressReporter:
+    """
+    进度上报：每次进度变化写入实时存储（Redis）并推送事件，
+    数据库只在进度跨过检查点步长或超过检查点间隔时写一次，终态由调用方写入
+    实例可直接作为 progress_callback 使用
+    """
+
+    def __init__(self, article_id: str, task_id: str, status: str,
+                 checkpoint: Optional[Callable[[int], None]] = None, **event_fields):
+        self.article_id = article_id
+        self.task_id = task_id
+        self.status = status
+        self.checkpoint = checkpoint
+        self.event_fields = event_fields
+        self.progress = None
+        self._last_publish_at = 0.0
+        self._last_checkpoint_progress = 0
+        self._last_checkpoint_at = time.time()
+        self._lock = threading.Lock()
+
+    def __call__(self, progress: int):
+        with self._lock:
+            # 合并重复或回退的进度
+            if self.progress is not None and progress <= self.progress:
+                return
+            self.progress = progress
+            now = time.time()
+
+            # 节流：两次推送之间至少间隔 progress_publish_interval（100%总是推送）
+            if progress >= 100 or now - self._last_publish_at >= settings.progress_publish_interval:
+                self._last_publish_at = now
+                set_live_progress(self.article_id, {"status": self.status, "progress": progress, "updated_at": now})
+                publish_article_event(
+                    self.article_id,
+                    self.task_id,
+                    status=self.status,
+                    translation_progress=progress,
+                    **self.event_fields
+                )
+
+            # 稀疏检查点
+            if self.checkpoint and (
+                progress - self._last_checkpoint_progress >= settings.progress_checkpoint_step
+                or now - self._last_checkpoint_at >= settings.progress_checkpoint_interval
+            ):
+                self._last_checkpoint_progress = progress
+                self._last_checkpoint_at = now
+                try:
+                    self.checkpoint(progress)
+                except Exception as e:
+                    print(f"Error writing progress checkpoint: {e}")
+
+    def finish(self):
+        """终态写入数据库后调用，清除实时进度"""
+        clear_live_progress(self.article_id)
@@ -0,0 +1,167 @@
+# 文本切分：段落 -> 句子 -> 长度均衡的片段，翻译和语音合成共用
+import math
+import re
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+# 句末不需要空格的语言（中文、日文）
+CJK_LANGS = {"zh", "ja"}
+
+# 句末标点之后可能紧跟的右引号/右括号，归入前一句
+_CLOSERS = "\"'”’」』）)\\]》"
+
+# 西文句末标点后必须是空白或文本结尾，且下一个词不是小写开头，避免在小数、网址、
+# 缩写和引语（"Really?" she asked.）中间断开；中日文句末标点（。！？…）后直接断开
+_LATIN_END = rf"[.!?]+[{_CLOSERS}]*(?=\s*$|\s+[^\sa-z])"
+_LATIN_BOUNDARY = re.compile(rf"[。！？]+[{_CLOSERS}]*|…+[{_CLOSERS}]*|{_LATIN_END}")
+# 中日文文本中半角的 !? 也常直接跟下一句
+_CJK_BOUNDARY = re.compile(rf"[。！？!?]+[{_CLOSERS}]*|…+[{_CLOSERS}]*|{_LATIN_END}")
+
+# 句子过长时退而按分句标点切分，再不行按空白切分
+_CLAUSE_BOUNDARY = re.compile(r"[，,；;：:、]+")
+_WHITESPACE = re.compile(r"\s+")
+
+# 句点结尾但不是句末的常见缩写
+_ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "inc", "ltd", "co", "corp",
+    "no", "fig", "e.g", "i.e", "u.s", "u.k", "a.m", "p.m", "jan", "feb", "mar", "apr", "jun",
+    "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+}
+_LAST_WORD = re.compile(r"([A-Za-z][A-Za-z.]*)\.$")
+
+
+def is_cjk(lang: Optional[str]) -> bool:
+    return bool(lang) and lang.split("-")[0].lower() in CJK_LANGS
+
+
+def joiner(lang: Optional[str]) -> str:
+    """同一段落内片段重新拼接时使用的分隔符"""
+    return "" if is_cjk(lang) else " "
+
+
+def _is_abbreviation(text: str) -> bool:
+    match = _LAST_WORD.search(text)
+    return bool(match) and match.group(1).lower() in _ABBREVIATIONS
+
+
+def _boundary_spans(text: str, pattern: re.Pattern, start: int, end: int, abbreviations: bool = False) -> List[Tuple[int, int]]:
+    """
+    按pattern切分 text[start:end]，返回首尾相接的 (起, 止) 范围，所有范围拼起来就是原文
+    """
+    spans = []
+    current = start
+    for match in pattern.finditer(text, start, end):
+        if abbreviations and match.group().endswith(".") and _is_abbreviation(text[current:match.end()]):
+            continue
+        if match.end() > current and text[current:match.end()].strip():
+            spans.append((current, match.end()))
+            current = match.end()
+    if current < end:
+        if spans and not text[current:end].strip():
+            # 末尾只剩空白，并入最后一段
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((current, end))
+    return spans
+
+
+def pack_balanced(lengths: Sequence[int], limit: int) -> List[Tuple[int, int]]:
+    """
+    把连续的单元打包成若干组，每组总长度不超过limit（单个单元本身超长时独占一组），
+    并且各组长度尽量接近，避免最后剩下一个很短的尾巴
+    返回每组的单元下标范围 [起, 止)
+    """
+    if not lengths:
+        return []
+    total = sum(lengths)
+    # 从理论最少组数开始，按平均长度为目标贪心打包；单元边界不齐导致多出一组时增加组数重试
+    count = max(1, math.ceil(total / max(1, limit)))
+    while True:
+        groups = _pack_greedy(lengths, limit, total / count)
+        if len(groups) <= count or count >= len(lengths):
+            return groups
+        count += 1
+
+
+def _pack_greedy(lengths: Sequence[int], limit: int, target: float) -> List[Tuple[int, int]]:
+    groups = []
+    group_start = 0
+    group_length = 0
+    for i, length in enumerate(lengths):
+        if i > group_start:
+            merged = group_length + length
+            # 超过上限，或者加上这一单元比不加离目标长度更远时，先结束当前组
+            if merged > limit or (merged > target and merged - target > target - group_length):
+                groups.append((group_start, i))
+                group_start = i
+                group_length = 0
+        group_length += length
+    groups.append((group_start, len(lengths)))
+    return groups
+
+
+def _sentence_spans(text: str, lang: Optional[str], start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    end = len(text) if end is None else end
+    if is_cjk(lang):
+        return _boundary_spans(text, _CJK_BOUNDARY, start, end)
+    return _boundary_spans(text, _LATIN_BOUNDARY, start, end, abbreviations=True)
+
+
+def _fit_spans(text: str, spans: List[Tuple[int, int]], max_length: int) -> List[Tuple[int, int]]:
+    """把超过max_length的句子继续按分句标点、空白切开，最后按长度硬切"""
+    fitted = []
+    for start, end in spans:
+        if end - start <= max_length:
+            fitted.append((start, end))
+            continue
+        parts = [(start, end)]
+        for pattern in (_CLAUSE_BOUNDARY, _WHITESPACE):
+            parts = [
+                part
+                for part_start, part_end in parts
+                for part in (
+                    _boundary_spans(text, pattern, part_start, part_end)
+                    if part_end - part_start > max_length else [(part_start, part_end)]
+                )
+            ]
+        for part_start, part_end in parts:
+            # 仍然超长的部分按均等长度硬切
+            size = math.ceil((part_end - part_start) / math.ceil((part_end - part_start) / max_length))
+            for cut in range(part_start, part_end, size):
+                fitted.append((cut, min(cut + size, part_end)))
+    return fitted
+
+
+def iter_sentences(text: str, lang: Optional[str] = None) -> Iterator[str]:
+    """逐句输出（保留句末标点和引号，去掉首尾空白）"""
+    for start, end in _sentence_spans(text, lang):
+        sentence = text[start:end].strip()
+        if sentence:
+            yield sentence
+
+
+def iter_pieces(paragraph: str, max_length: int, lang: Optional[str] = None) -> Iterator[str]:
+    """
+    把一个段落切成不超过max_length的片段：按句子边界打包且各片段长度均衡，
+    片段是原文的连续切片，标点和句间空白保持原样
+    """
+    paragraph = paragraph.strip()
+    if not paragraph:
+        return
+    if len(paragraph) <= max_length:
+        yield paragraph
+        return
+    spans = _fit_spans(paragraph, _sentence_spans(paragraph, lang), max_length)
+    for first, last in pack_balanced([end - start for start, end in spans], max_length):
+        piece = paragraph[spans[first][0]:spans[last - 1][1]].strip()
+        if piece:
+            yield piece
+
+
+def iter_segments(text: str, max_length: int, lang: Optional[str] = None, paragraph_separator: str = "\n") -> Iterator[Tuple[int, str]]:
+    """
+    按段落分隔符拆分文本，过长段落再切成均衡片段
+    输出 (段落下标, 片段)，空段落不输出；同一段落的片段按 joiner(目标语言) 拼回
+    """
+    for index, paragraph in enumerate(text.split(paragraph_separator)):
+        for piece in iter_pieces(paragraph, max_length, lang):
+            yield index, piece
@@ -0,0 +1,21 @@
+import os
+import sys
+from typing import Optional
+
+from sqlalchemy import func, select
+
+# 添加backend目录到路径
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+
+async def count_tasks(db, status: Optional[str] = None) -> int:
+    """
+    返回任务总数（可按状态过滤）
+    读取由触发器维护的 task_counts（每个状态一行），所有进程看到的总数一致，不需要 COUNT 全表
+    """
+    from app import models
+    query = select(func.coalesce(func.sum(models.TaskCount.count), 0))
+    if status:
+        query = query.where(models.TaskCount.status == status)
+    return await db.scalar(query)
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+# 添加backend目录到路径
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from config import settings
+
+
+def normalize_segment(segment: str) -> str:
+    """规范化片段：合并连续空白，去掉首尾空白"""
+    return ' '.join(segment.split())
+
+
+def make_cache_key(source_lang: str, target_lang: str, model_version: str, segment: str) -> str:
+    """根据 (源语言, 目标语言, 模型版本, 规范化片段) 计算缓存key"""
+    raw = '\x1f'.join([source_lang, target_lang, model_version or '', normalize_segment(segment)])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class TranslationCache:
+    """
+    片段级翻译缓存，存储在本地SQLite文件中
+    按最近访问时间做LRU淘汰，条目数和总字节数都有上限
+    条目数和总字节数由触发器维护在 segment_totals 中，写入时不需要扫描全表
+    """
+
+    def __init__(self, path: str, max_entries: int, max_bytes: int):
+        self.path = os.path.abspath(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取数据库连接（fork之后的子进程重新打开连接）"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS segments ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_segments_last_access ON segments (last_access)")
+            conn.commit()
+            self._ensure_totals(conn)
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _ensure_totals(self, conn: sqlite3.Connection):
+        """创建合计表和维护它的触发器；旧的缓存文件首次打开时扫描一次得到初始值"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS segment_totals ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO segment_totals (id, entries, bytes) "
+                "SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM segments"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS segments_totals_insert AFTER INSERT ON segments BEGIN "
+                "UPDATE segment_totals SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 0; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS segments_totals_delete AFTER DELETE ON segments BEGIN "
+                "UPDATE segment_totals SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 0; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS segments_totals_update AFTER UPDATE OF size ON segments BEGIN "
+                "UPDATE segment_totals SET bytes = bytes - OLD.size + NEW.size WHERE id = 0; END"
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _totals(self, conn: sqlite3.Connection) -> Tuple[int, int]:
+        return conn.execute("SELECT entries, bytes FROM segment_totals WHERE id = 0").fetchone()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """批量查询，返回命中的 {key: 译文}，同时刷新命中条目的访问时间"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            # SQLite单条语句的参数个数有限制，分批查询
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, value FROM segments WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE segments SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, str]]):
+        """批量写入 (key, 译文)，写入后按需淘汰"""
+        now = time.time()
+        rows = [(key, value, len(value.encode('utf-8')), now) for key, value in items]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connection()
+            # 用UPSERT而不是 INSERT OR REPLACE：REPLACE删除旧行时不会触发删除触发器，合计会偏差
+            conn.executemany(
+                "INSERT INTO segments (key, value, size, last_access) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "last_access = excluded.last_access",
+                rows
+            )
+            conn.commit()
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """超出条目数或字节数上限时，按最近访问时间淘汰最旧的条目"""
+        count, total_bytes = self._totals(conn)
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        # 淘汰到上限的90%，避免每次写入都触发淘汰
+        target_entries = int(self.max_entries * 0.9)
+        target_bytes = int(self.max_bytes * 0.9)
+        removed = 0
+        while count > target_entries or total_bytes > target_bytes:
+            if count > target_entries:
+                batch_size = count - target_entries
+            else:
+                batch_size = max(count // 100, 1)
+            rows = conn.execute(
+                "SELECT key, size FROM segments ORDER BY last_access LIMIT ?", (batch_size,)
+            ).fetchall()
+            if not rows:
+                break
+            conn.executemany("DELETE FROM segments WHERE key = ?", [(key,) for key, _ in rows])
+            count -= len(rows)
+            total_bytes -= sum(size for _, size in rows)
+            removed += len(rows)
+        conn.commit()
+        print(f"Translation cache evicted {removed} entries")
+
+    def stats(self) -> dict:
+        """返回缓存统计信息"""
+        with self._lock:
+            count, total_bytes = self._totals(self._connection())
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "bytes": total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM segments")
+            conn.commit()
+
+
+class TranslationCheckpoint:
+    """
+    单篇文章翻译过程中的片段检查点：每完成一批片段就追加写入并刷盘，
+    任务中断后重新执行时直接取回已完成的片段，不依赖翻译缓存是否启用或已被淘汰
+    文件为JSON Lines，每行 {"key": 缓存key, "value": 译文}；翻译完成后删除
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, str]:
+        """读取已完成的片段；最后一行可能因进程被杀而不完整，忽略无法解析的行"""
+        results = {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        item = json.loads(line)
+                        results[item["key"]] = item["value"]
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except FileNotFoundError:
+            pass
+        return results
+
+    def append(self, items: Iterable[Tuple[str, str]]):
+        """追加一批已完成的片段并刷盘"""
+        lines = ''.join(json.dumps({"key": key, "value": value}, ensure_ascii=False) + '\n' for key, value in items)
+        if not lines:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a+b') as f:
+                # 上次写入被中断时末尾没有换行，先补上，避免与新行粘连
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        lines = '\n' + lines
+                f.write(lines.encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        """翻译完成后删除检查点"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def translation_checkpoint(checkpoint_id: str) -> TranslationCheckpoint:
+    """按检查点ID（通常为文章ID）获取翻译检查点"""
+    return TranslationCheckpoint(os.path.join(settings.checkpoint_path, f"{checkpoint_id}.translation.jsonl"))
+
+
+def create_translation_cache() -> Optional[TranslationCache]:
+    """根据配置创建翻译缓存，未启用时返回None"""
+    if not settings.translation_cache_enabled:
+        return None
+    return TranslationCache(
+        settings.translation_cache_path,
+        max_entries=settings.translation_cache_max_entries,
+        max_bytes=settings.translation_cache_max_bytes,
+    )
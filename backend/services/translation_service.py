@@ -1,8 +1,12 @@
-import argostranslate.package
-import argostranslate.translate
-from typing import Optional, Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Callable, List
+import atexit
+import difflib
+import multiprocessing
 import sys
 import os
+import threading
 import time
 
 # 添加backend目录到路径
@@ -10,6 +14,43 @@ backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__
 sys.path.insert(0, backend_dir)
 
 from config import settings
+from services.metrics import observe_translation
+from services.segmentation import iter_segments, iter_sentences, joiner, pack_balanced
+from services.translation_cache import TranslationCheckpoint, create_translation_cache, make_cache_key, translation_checkpoint
+
+
+class TranslationError(Exception):
+    """严格模式下翻译失败（有片段未能翻译）"""
+    pass
+
+
+def _init_pool_worker(source_lang_code: str):
+    """进程池worker初始化：每个进程启动时加载一次翻译模型，之后复用"""
+    # 语言包已由父进程准备好，worker只检查本地安装
+    translation_service.offline = True
+    try:
+        translation_service._get_translation(source_lang_code)
+    except Exception as e:
+        print(f"Error preloading translation model in pool worker: {e}")
+
+
+def _pool_translate_lines(lines: List[str], source_lang_code: str) -> tuple[List[str], float]:
+    """在进程池worker中翻译一批片段，返回 (译文, 翻译耗时秒数)，耗时由主进程记录到指标"""
+    started = time.perf_counter()
+    results = translation_service._translate_lines(lines, source_lang_code)
+    return results, time.perf_counter() - started
+
+
+def _package_translation(translation):
+    """
+    取出Argos翻译对象底层的PackageTranslation（get_translation返回的是CachedTranslation包装）
+    经由中间语言的组合翻译等没有单一模型的情况返回None
+    """
+    while translation is not None and not hasattr(translation, 'pkg'):
+        translation = getattr(translation, 'underlying', None)
+    if translation is None or getattr(translation.pkg, 'tokenizer', None) is None:
+        return None
+    return translation
 
 
 class TranslationService:
@@ -19,13 +60,49 @@ class TranslationService:
         self.target_lang_code = 'zh' if self.target_language == 'zh' else self.target_language
         # 默认源语言（自动检测或英文）
         self.default_source_lang_code = 'en'
-        
-        # 确保已安装语言包
-        self._ensure_package_installed()
+        # 已加载的翻译对象缓存，key为 (source, target)
+        self._translations = {}
+        # 已安装模型版本缓存，用于翻译缓存的key
+        self._model_versions = {}
+        # 片段级翻译缓存（未启用时为None）
+        self.cache = create_translation_cache()
+        # 并行翻译用的进程池（按需创建，跨任务复用）；当前进程无法启动进程池时停用并行模式
+        self._pool = None
+        self._pool_disabled = False
+        self._pool_lock = threading.Lock()
+        # 离线模式：只检查已安装的语言包，不访问网络
+        self.offline = settings.translation_offline
+        # 语言包检查在首次使用时进行（延迟初始化），避免导入时访问网络
+        self._ready = False
+        self._init_lock = threading.Lock()
+    
+    def _ensure_ready(self):
+        """首次使用时确保语言包可用（只执行一次）"""
+        if self._ready:
+            return
+        with self._init_lock:
+            if not self._ready:
+                self._ensure_package_installed()
+                self._ready = True
     
     def _ensure_package_installed(self):
         """确保必要的语言包已安装"""
+        import argostranslate.package
+        
         try:
+            # 已安装时无需访问网络
+            installed_packages = argostranslate.package.get_installed_packages()
+            is_installed = any(
+                pkg.from_code == self.default_source_lang_code and pkg.to_code == self.target_lang_code
+                for pkg in installed_packages
+            )
+            if is_installed:
+                return
+            
+            if self.offline:
+                print(f"Warning: Language package {self.default_source_lang_code} -> {self.target_lang_code} not installed (offline mode)")
+                return
+            
             # 更新可用包列表
             argostranslate.package.update_package_index()
             available_packages = argostranslate.package.get_available_packages()
@@ -38,40 +115,364 @@ class TranslationService:
                     break
             
             if package_to_use:
-                # 检查是否已安装
-                installed_packages = argostranslate.package.get_installed_packages()
-                is_installed = any(
-                    pkg.from_code == package_to_use.from_code and pkg.to_code == package_to_use.to_code
-                    for pkg in installed_packages
-                )
-                
-                if not is_installed:
-                    print(f"Installing language package: {package_to_use.from_code} -> {package_to_use.to_code}")
-                    argostranslate.package.install_from_path(package_to_use.download())
-                    print("Language package installed successfully")
+                print(f"Installing language package: {package_to_use.from_code} -> {package_to_use.to_code}")
+                argostranslate.package.install_from_path(package_to_use.download())
+                print("Language package installed successfully")
             else:
                 print(f"Warning: Language package {self.default_source_lang_code} -> {self.target_lang_code} not found")
         except Exception as e:
             print(f"Error ensuring language package: {e}")
     
-    def translate_text(self, text: str, source_language: Optional[str] = None, max_chunk_length: int = 1000, progress_callback: Optional[Callable[[int, int], None]] = None) -> str:
+    def warmup(self, source_language: Optional[str] = None):
+        """预热：确保语言包已安装，并把翻译模型加载到内存"""
+        start = time.time()
+        source_lang_code = source_language or self.default_source_lang_code
+        self._get_translation(source_lang_code).translate("Hello")
+        print(f"Translation model {source_lang_code} -> {self.target_lang_code} ready in {time.time() - start:.1f}s")
+    
+    def _get_translation(self, source_lang_code: str):
+        """获取Argos翻译对象（缓存），避免每次调用都重新扫描已安装的语言包"""
+        key = (source_lang_code, self.target_lang_code)
+        translation = self._translations.get(key)
+        if translation is None:
+            import argostranslate.translate
+            
+            self._ensure_ready()
+            languages = argostranslate.translate.get_installed_languages()
+            from_lang = next((lang for lang in languages if lang.code == source_lang_code), None)
+            to_lang = next((lang for lang in languages if lang.code == self.target_lang_code), None)
+            if from_lang is None or to_lang is None:
+                raise ValueError(f"Language package {source_lang_code} -> {self.target_lang_code} not installed")
+            translation = from_lang.get_translation(to_lang)
+            if translation is None:
+                raise ValueError(f"No translation available for {source_lang_code} -> {self.target_lang_code}")
+            self._translations[key] = translation
+        return translation
+    
+    def _get_model_version(self, source_lang_code: str) -> str:
+        """获取已安装语言包的版本号，模型升级后旧的缓存自然失效"""
+        key = (source_lang_code, self.target_lang_code)
+        if key not in self._model_versions:
+            version = ''
+            try:
+                import argostranslate.package
+                
+                for pkg in argostranslate.package.get_installed_packages():
+                    if pkg.from_code == source_lang_code and pkg.to_code == self.target_lang_code:
+                        version = str(getattr(pkg, 'package_version', '') or '')
+                        break
+            except Exception as e:
+                print(f"Error reading package version: {e}")
+            self._model_versions[key] = version
+        return self._model_versions[key]
+    
+    def _get_pool(self, source_lang_code: str) -> Optional[ProcessPoolExecutor]:
+        """
+        获取并行翻译进程池，首次使用时创建
+        守护进程（Celery prefork的子进程）不能再创建子进程，此时停用并行模式并返回None；
+        需要并行翻译时worker应使用 -P solo / -P threads，prefork下通过增加worker并发数利用多核
+        """
+        with self._pool_lock:
+            if self._pool_disabled:
+                return None
+            if multiprocessing.current_process().daemon:
+                self._disable_pool("running in a daemonic process (e.g. Celery prefork child)")
+                return None
+            if self._pool is None:
+                pool_size = settings.translation_pool_size or os.cpu_count() or 1
+                print(f"Starting translation process pool with {pool_size} workers...")
+                # 使用spawn启动，避免fork已加载模型的进程
+                self._pool = ProcessPoolExecutor(
+                    max_workers=pool_size,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_pool_worker,
+                    initargs=(source_lang_code,)
+                )
+            return self._pool
+    
+    def _disable_pool(self, reason):
+        """停用并行模式（只提示一次），之后的翻译都走串行路径；调用方持有 _pool_lock"""
+        if not self._pool_disabled:
+            print(f"Parallel translation unavailable ({reason}), falling back to serial translation")
+        self._pool_disabled = True
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def shutdown_pool(self):
+        """关闭并行翻译进程池"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+    
+    def _build_batches(self, segments: List[str], batch_chars: int) -> List[List[int]]:
+        """把片段按字符数分批（各批长度均衡，并行时各进程负载接近），返回每批的片段下标"""
+        return [
+            list(range(first, last))
+            for first, last in pack_balanced([len(segment) for segment in segments], batch_chars)
+        ]
+    
+    def _get_translator(self, package_translation):
+        """获取语言包的CTranslate2 Translator（与Argos共用同一个实例，只加载一次）"""
+        if package_translation.translator is None:
+            import ctranslate2
+            from argostranslate import settings as argos_settings
+            
+            model_path = str(package_translation.pkg.package_path / "model")
+            package_translation.translator = ctranslate2.Translator(model_path, device=argos_settings.device)
+        return package_translation.translator
+    
+    def _translate_lines(self, lines: List[str], source_lang_code: str, progress_callback: Optional[Callable[[int], None]] = None) -> List[str]:
+        """
+        翻译多行文本，返回逐行对应的译文
+        各行先切成句子，所有行的句子按 translation_model_batch_size 分组直接送入CTranslate2批量推理
+        （Argos的 translate() 会按换行拆开逐段推理，把多行合成一次调用并不能跨段落批量）；
+        没有单一模型可用时（例如经由中间语言的组合翻译）逐行调用 translate()
+        progress_callback: 每完成一组句子（逐行模式下每完成一行）调用一次，参数为已完成的原文字符数
+        """
+        translation = self._get_translation(source_lang_code)
+        package_translation = _package_translation(translation)
+        if package_translation is None:
+            results = []
+            done_chars = 0
+            for line in lines:
+                results.append(translation.translate(line))
+                done_chars += len(line)
+                if progress_callback:
+                    progress_callback(done_chars)
+            return results
+        
+        # (行号, 句子)
+        sentences = [
+            (line_index, sentence)
+            for line_index, line in enumerate(lines)
+            for sentence in iter_sentences(line, source_lang_code)
+        ]
+        pkg = package_translation.pkg
+        translator = self._get_translator(package_translation)
+        target_prefix = getattr(pkg, 'target_prefix', '') or ''
+        batch_size = settings.translation_model_batch_size
+        
+        translated_lines = [[] for _ in lines]
+        done_chars = 0
+        for start in range(0, len(sentences), batch_size):
+            group = sentences[start:start + batch_size]
+            tokenized = [pkg.tokenizer.encode(sentence) for _, sentence in group]
+            # 解码参数与Argos一致
+            results = translator.translate_batch(
+                tokenized,
+                target_prefix=[[target_prefix]] * len(tokenized) if target_prefix else None,
+                replace_unknowns=True,
+                max_batch_size=batch_size,
+                beam_size=4,
+                num_hypotheses=1,
+                length_penalty=0.2,
+            )
+            for (line_index, sentence), result in zip(group, results):
+                value = pkg.tokenizer.decode(result.hypotheses[0])
+                if target_prefix and value.startswith(target_prefix):
+                    value = value[len(target_prefix):]
+                translated_lines[line_index].append(value.strip())
+                done_chars += len(sentence)
+            if progress_callback:
+                progress_callback(done_chars)
+        
+        separator = joiner(self.target_lang_code)
+        return [separator.join(parts) for parts in translated_lines]
+    
+    def _translate_batched(self, text: str, source_lang_code: str, max_chunk_length: int, progress_callback: Optional[Callable[[int, int], None]] = None, parallel: bool = False, checkpoint: Optional[TranslationCheckpoint] = None, strict: bool = False) -> str:
+        """
+        批量翻译模式：按行拆分段落，过长段落再按句子打包，
+        片段分批送入翻译模型，最后按原有段落结构拼回
+        parallel: 为True时各批次分发到进程池并行翻译
+        checkpoint: 每完成一批就写入检查点，重新执行时跳过已完成的片段
+        strict: 为True时有批次翻译失败则抛出 TranslationError（已完成的批次已写入检查点），
+                否则失败的批次使用原文
+        """
+        lines = text.split('\n')
+        # (行号, 片段文本)
+        segments = list(iter_segments(text, max_chunk_length, lang=source_lang_code))
+        
+        if not segments:
+            if progress_callback:
+                progress_callback(1, 1)
+            return text
+        
+        translated_segments = [None] * len(segments)
+        
+        cache_keys = None
+        if self.cache is not None or checkpoint is not None:
+            model_version = self._get_model_version(source_lang_code)
+            cache_keys = [
+                make_cache_key(source_lang_code, self.target_lang_code, model_version, segment)
+                for _, segment in segments
+            ]
+        
+        # 先取回检查点中上次已完成的片段
+        if checkpoint is not None:
+            done = checkpoint.load()
+            resumed = 0
+            for i, key in enumerate(cache_keys):
+                if key in done:
+                    translated_segments[i] = done[key]
+                    resumed += 1
+            if resumed:
+                print(f"Resuming translation from checkpoint: {resumed}/{len(segments)} segments done")
+        
+        # 再查翻译缓存，只翻译未命中的片段
+        if self.cache is not None:
+            lookup = [key for key, result in zip(cache_keys, translated_segments) if result is None]
+            try:
+                cached = self.cache.get_many(lookup)
+            except Exception as e:
+                print(f"Error reading translation cache: {e}")
+                cached = {}
+            for i, key in enumerate(cache_keys):
+                if translated_segments[i] is None and key in cached:
+                    translated_segments[i] = cached[key]
+        
+        pending = [i for i, result in enumerate(translated_segments) if result is None]
+        batches = [
+            [pending[j] for j in batch]
+            for batch in self._build_batches([segments[i][1] for i in pending], settings.translation_batch_chars)
+        ]
+        print(f"Translating {len(pending)}/{len(segments)} segments in {len(batches)} batches...")
+        
+        failed_batches = []
+        
+        def store_results(batch_index: int, results: Optional[List[str]]):
+            indices = batches[batch_index]
+            if results is None:
+                # 如果翻译失败，使用原文（严格模式下最后抛出异常）
+                failed_batches.append(batch_index)
+                results = [segments[i][1] for i in indices]
+            else:
+                if self.cache is not None:
+                    try:
+                        self.cache.put_many((cache_keys[i], result) for i, result in zip(indices, results))
+                    except Exception as e:
+                        print(f"Error writing translation cache: {e}")
+                if checkpoint is not None:
+                    try:
+                        checkpoint.append((cache_keys[i], result) for i, result in zip(indices, results))
+                    except Exception as e:
+                        print(f"Error writing translation checkpoint: {e}")
+            for i, result in zip(indices, results):
+                translated_segments[i] = result
+        
+        # 进度按已翻译的原文字符数计算，串行模式下每批内部按句子组上报
+        total_chars = sum(len(segments[i][1]) for i in pending)
+        completed_chars = 0
+        remaining = list(range(len(batches)))
+        pool = self._get_pool(source_lang_code) if parallel and len(batches) > 1 else None
+        if pool is not None:
+            # 并行模式：各批次分发到进程池，按完成顺序汇总进度，结果按下标放回原位
+            try:
+                futures = {
+                    pool.submit(_pool_translate_lines, [segments[i][1] for i in batches[b]], source_lang_code): b
+                    for b in remaining
+                }
+            except Exception as e:
+                # 进程池无法启动（例如不允许创建子进程）：停用并行模式，全部批次串行翻译
+                with self._pool_lock:
+                    self._disable_pool(e)
+                futures = {}
+            try:
+                for future in as_completed(futures):
+                    batch_index = futures[future]
+                    try:
+                        results, seconds = future.result()
+                        observe_translation("parallel", sum(len(segments[i][1]) for i in batches[batch_index]), seconds)
+                        store_results(batch_index, results)
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        print(f"Error translating batch {batch_index + 1}: {e}")
+                        store_results(batch_index, None)
+                    remaining.remove(batch_index)
+                    completed_chars += sum(len(segments[i][1]) for i in batches[batch_index])
+                    if progress_callback:
+                        progress_callback(completed_chars, total_chars)
+            except BrokenProcessPool as e:
+                # 进程池异常退出时丢弃该池，剩余批次回退到串行翻译
+                print(f"Translation process pool broken, falling back to serial: {e}")
+                self.shutdown_pool()
+        
+        for batch_index in remaining:
+            batch_lines = [segments[i][1] for i in batches[batch_index]]
+            batch_chars = sum(len(line) for line in batch_lines)
+            
+            def batch_progress(done_chars: int, base: int = completed_chars, batch_chars: int = batch_chars):
+                if progress_callback:
+                    progress_callback(base + min(done_chars, batch_chars), total_chars)
+            
+            try:
+                started = time.perf_counter()
+                results = self._translate_lines(batch_lines, source_lang_code, progress_callback=batch_progress)
+                observe_translation("batched", batch_chars, time.perf_counter() - started)
+            except Exception as e:
+                print(f"Error translating batch {batch_index + 1}: {e}")
+                results = None
+            store_results(batch_index, results)
+            
+            completed_chars += batch_chars
+            if progress_callback:
+                progress_callback(completed_chars, total_chars)
+        
+        if not batches and progress_callback:
+            # 全部命中缓存
+            progress_callback(1, 1)
+        
+        if strict and failed_batches:
+            raise TranslationError(f"{len(failed_batches)}/{len(batches)} translation batches failed")
+        
+        # 按行号拼回，同一段落被拆开的片段重新连接
+        separator = joiner(self.target_lang_code)
+        translated_lines = [[] for _ in lines]
+        for (line_index, _), result in zip(segments, translated_segments):
+            translated_lines[line_index].append(result.strip())
+        return '\n'.join(separator.join(parts) for parts in translated_lines)
+    
+    def translate_text(self, text: str, source_language: Optional[str] = None, max_chunk_length: int = 1000, progress_callback: Optional[Callable[[int, int], None]] = None, batched: Optional[bool] = None, parallel: Optional[bool] = None, checkpoint: Optional[TranslationCheckpoint] = None, strict: bool = False) -> str:
         """
         翻译文本到目标语言（默认中文）
         对于长文本，分段翻译以提高速度
-        progress_callback: 进度回调函数，参数为 (current_chunk, total_chunks)
+        progress_callback: 进度回调函数，参数为 (已完成量, 总量)：分段模式按chunk计，批量模式按原文字符数计
+        batched: 是否使用批量翻译模式，默认取 settings.translation_batched
+        parallel: 批量模式下是否用进程池并行翻译，默认取 settings.translation_parallel
+        checkpoint: 批量模式下的片段检查点，用于中断后续做
+        strict: 为True时翻译失败抛出异常，否则返回原文
         
         注意：Argos Translate是离线翻译，不需要网络连接，但chunk大小建议较小（1000字符）
         """
         if not text:
             return text
         
+        if batched is None:
+            batched = settings.translation_batched
+        if parallel is None:
+            parallel = settings.translation_parallel
+        
         try:
             # 确定源语言代码
             source_lang_code = source_language if source_language else self.default_source_lang_code
             
+            if batched:
+                return self._translate_batched(
+                    text, source_lang_code, max_chunk_length, progress_callback,
+                    parallel=parallel, checkpoint=checkpoint, strict=strict
+                )
+            
+            import argostranslate.translate
+            
+            self._ensure_ready()
+            
             # 如果文本较短，直接翻译
             if len(text) <= max_chunk_length:
+                started = time.perf_counter()
                 translated_text = argostranslate.translate.translate(text, source_lang_code, self.target_lang_code)
+                observe_translation("chunked", len(text), time.perf_counter() - started)
                 if progress_callback:
                     progress_callback(1, 1)
                 return translated_text
@@ -79,48 +480,17 @@ class TranslationService:
             # 长文本分段翻译
             print(f"Text length {len(text)} exceeds limit, splitting into chunks...")
             
-            # 按段落分割文本
-            paragraphs = text.split('\n\n')
+            # 按段落切分，过长段落按句子切成均衡片段，再把相邻片段打包成不超过限制的chunk
+            segments = list(iter_segments(text, max_chunk_length, lang=source_lang_code, paragraph_separator='\n\n'))
+            groups = pack_balanced([len(segment) for _, segment in segments], max_chunk_length)
+            source_separator = joiner(source_lang_code)
             chunks = []
-            current_chunk = []
-            current_length = 0
-            
-            for para in paragraphs:
-                para_length = len(para)
-                # 如果单个段落就超过限制，按句子分割
-                if para_length > max_chunk_length:
-                    # 先处理当前chunk
-                    if current_chunk:
-                        chunks.append('\n\n'.join(current_chunk))
-                        current_chunk = []
-                        current_length = 0
-                    
-                    # 按句子分割长段落
-                    sentences = para.split('. ')
-                    for sentence in sentences:
-                        sentence = sentence.strip()
-                        if not sentence:
-                            continue
-                        sentence_length = len(sentence)
-                        if current_length + sentence_length > max_chunk_length:
-                            if current_chunk:
-                                chunks.append('\n\n'.join(current_chunk))
-                                current_chunk = []
-                                current_length = 0
-                        current_chunk.append(sentence)
-                        current_length += sentence_length
-                else:
-                    # 如果加上当前段落超过限制，先处理当前chunk
-                    if current_length + para_length > max_chunk_length and current_chunk:
-                        chunks.append('\n\n'.join(current_chunk))
-                        current_chunk = []
-                        current_length = 0
-                    current_chunk.append(para)
-                    current_length += para_length
-            
-            # 添加最后一个chunk
-            if current_chunk:
-                chunks.append('\n\n'.join(current_chunk))
+            for first, last in groups:
+                chunk = segments[first][1]
+                for i in range(first + 1, last):
+                    same_paragraph = segments[i][0] == segments[i - 1][0]
+                    chunk += (source_separator if same_paragraph else '\n\n') + segments[i][1]
+                chunks.append(chunk)
             
             print(f"Split into {len(chunks)} chunks for translation")
             
@@ -129,7 +499,9 @@ class TranslationService:
             for i, chunk in enumerate(chunks):
                 try:
                     print(f"Translating chunk {i+1}/{len(chunks)} ({len(chunk)} chars)...")
+                    started = time.perf_counter()
                     translated_chunk = argostranslate.translate.translate(chunk, source_lang_code, self.target_lang_code)
+                    observe_translation("chunked", len(chunk), time.perf_counter() - started)
                     translated_chunks.append(translated_chunk)
                     
                     # 调用进度回调
@@ -137,64 +509,157 @@ class TranslationService:
                         progress_callback(i + 1, len(chunks))
                 except Exception as e:
                     print(f"Error translating chunk {i+1}: {e}")
+                    if strict:
+                        raise
                     # 如果翻译失败，使用原文
                     translated_chunks.append(chunk)
                     if progress_callback:
                         progress_callback(i + 1, len(chunks))
             
-            # 合并翻译结果
-            return '\n\n'.join(translated_chunks)
+            # 合并翻译结果：chunk在段落中间断开时按目标语言拼接，否则以空行分隔
+            result = translated_chunks[0] if translated_chunks else ''
+            for (first, _), translated_chunk in zip(groups[1:], translated_chunks[1:]):
+                same_paragraph = segments[first][0] == segments[first - 1][0]
+                result += (joiner(self.target_lang_code) if same_paragraph else '\n\n') + translated_chunk
+            return result
             
         except Exception as e:
             print(f"Translation error: {e}")
             import traceback
             traceback.print_exc()
+            if strict:
+                raise
             # 如果翻译失败，返回原文
             return text
     
-    def translate_article(self, title: str, content: str, progress_callback: Optional[Callable[[int], None]] = None) -> tuple[str, str]:
+    def retranslate_text(self, old_text: str, old_translated: Optional[str], new_text: str, progress_callback: Optional[Callable[[int, int], None]] = None, parallel: Optional[bool] = None, checkpoint: Optional[TranslationCheckpoint] = None, strict: bool = False) -> tuple[str, int]:
+        """
+        增量翻译：按行比较新旧原文，只翻译新增或修改的行，其余行沿用旧译文
+        返回: (新译文, 重新翻译的行数)
+        
+        旧译文与旧原文按行一一对应（批量翻译模式的输出）时才能拼接，
+        否则（例如旧译文由分段模式生成）整篇重新翻译
+        长段落内部的句子级变化由片段缓存处理：未改变的句子片段直接命中缓存
+        """
+        old_lines = old_text.split('\n') if old_text else []
+        new_lines = new_text.split('\n')
+        if old_translated is None or len(old_translated.split('\n')) != len(old_lines):
+            print("Previous translation is not line-aligned, retranslating whole text")
+            translated = self.translate_text(
+                new_text, progress_callback=progress_callback, parallel=parallel, checkpoint=checkpoint, strict=strict
+            )
+            return translated, len(new_lines)
+        old_translated_lines = old_translated.split('\n')
+        
+        # 新译文按行拼装：未改变的行取旧译文，改变的行先占位，翻译后填入
+        translated_lines = [None] * len(new_lines)
+        changed = []
+        matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                translated_lines[j1:j2] = old_translated_lines[i1:i2]
+            else:
+                changed.extend(range(j1, j2))
+        
+        # 空行不需要翻译
+        to_translate = []
+        for j in changed:
+            if new_lines[j].strip():
+                to_translate.append(j)
+            else:
+                translated_lines[j] = ''
+        changed = to_translate
+        print(f"Incremental translation: {len(changed)}/{len(new_lines)} lines changed")
+        if changed:
+            changed_text = '\n'.join(new_lines[j] for j in changed)
+            source_lang_code = self.default_source_lang_code
+            if parallel is None:
+                parallel = settings.translation_parallel
+            changed_translated = self._translate_batched(
+                changed_text, source_lang_code, 1000, progress_callback,
+                parallel=parallel, checkpoint=checkpoint, strict=strict
+            ).split('\n')
+            for j, line in zip(changed, changed_translated):
+                translated_lines[j] = line
+        elif progress_callback:
+            progress_callback(1, 1)
+        return '\n'.join(translated_lines), len(changed)
+    
+    def retranslate_article(self, old_title: str, old_title_cn: Optional[str], old_content: str, old_content_cn: Optional[str], title: str, content: str, progress_callback: Optional[Callable[[int], None]] = None, parallel: Optional[bool] = None, checkpoint_id: Optional[str] = None) -> tuple[str, str, int]:
+        """
+        增量更新文章译文：标题未变时沿用旧标题译文，内容只翻译改变的行
+        返回: (translated_title, translated_content, 重新翻译的行数)
+        progress_callback: 进度回调函数，参数为 (progress_percentage) 0-100
+        checkpoint_id: 见 translate_article
+        """
+        checkpoint = translation_checkpoint(checkpoint_id) if checkpoint_id else None
+        strict = checkpoint is not None
+        if title == old_title and old_title_cn:
+            translated_title = old_title_cn
+        else:
+            try:
+                translated_title = self.translate_text(title, checkpoint=checkpoint, strict=strict)
+            except Exception as e:
+                print(f"Error translating title: {e}")
+                if strict:
+                    raise
+                translated_title = title
+        if progress_callback:
+            progress_callback(10)
+        
+        def content_progress(current: int, total: int):
+            # 内容进度映射到 10-100%
+            if progress_callback:
+                progress_callback(10 + int(current / total * 90))
+        
+        translated_content, changed_lines = self.retranslate_text(
+            old_content, old_content_cn, content, progress_callback=content_progress, parallel=parallel,
+            checkpoint=checkpoint, strict=strict
+        )
+        return translated_title, translated_content, changed_lines
+    
+    def translate_article(self, title: str, content: str, progress_callback: Optional[Callable[[int], None]] = None, parallel: Optional[bool] = None, checkpoint_id: Optional[str] = None) -> tuple[str, str]:
         """
         翻译文章标题和内容
         返回: (translated_title, translated_content)
         progress_callback: 进度回调函数，参数为 (progress_percentage) 0-100
+        parallel: 内容是否用进程池并行翻译，默认取 settings.translation_parallel
+        checkpoint_id: 指定时（通常为文章ID）已完成的片段写入检查点，任务重试时从断点续做；
+                       此时翻译失败会抛出异常而不是回退到原文，检查点由调用方在结果保存后清除
         """
+        checkpoint = translation_checkpoint(checkpoint_id) if checkpoint_id else None
+        strict = checkpoint is not None
         try:
             # 翻译标题 (占10%进度)
-            translated_title = self.translate_text(title)
+            translated_title = self.translate_text(title, checkpoint=checkpoint, strict=strict)
             if progress_callback:
                 progress_callback(10)  # 标题翻译完成，10%
         except Exception as e:
             print(f"Error translating title: {e}")
+            if strict:
+                raise
             translated_title = title  # 翻译失败时使用原标题
             if progress_callback:
                 progress_callback(10)
         
         try:
             # 翻译内容 (占90%进度)
-            # 计算内容需要分成多少块
-            max_chunk_length = 1000  # Argos Translate建议较小的chunk大小
-            content_length = len(content)
-            
-            if content_length > max_chunk_length:
-                # 估算chunk数量（用于进度计算）
-                estimated_chunks = (content_length // max_chunk_length) + 1
-                
-                def content_progress(current: int, total: int):
-                    # 标题已完成10%，内容从10%开始到100%
-                    # current/total 是内容的进度比例 (0-1)
-                    # 映射到 10-100%
-                    content_progress_pct = (current / total) * 90  # 0-90%
-                    overall_progress = 10 + int(content_progress_pct)  # 10-100%
-                    if progress_callback:
-                        progress_callback(overall_progress)
-                
-                translated_content = self.translate_text(content, progress_callback=content_progress)
-            else:
-                translated_content = self.translate_text(content)
+            def content_progress(current: int, total: int):
+                # 标题已完成10%，内容从10%开始到100%
+                # current/total 是内容的进度比例 (0-1)
+                # 映射到 10-100%
+                content_progress_pct = (current / total) * 90  # 0-90%
+                overall_progress = 10 + int(content_progress_pct)  # 10-100%
                 if progress_callback:
-                    progress_callback(100)  # 内容翻译完成
+                    progress_callback(overall_progress)
+            
+            translated_content = self.translate_text(
+                content, progress_callback=content_progress, parallel=parallel, checkpoint=checkpoint, strict=strict
+            )
         except Exception as e:
             print(f"Error translating content: {e}")
+            if strict:
+                raise
             translated_content = content  # 翻译失败时使用原内容
             if progress_callback:
                 progress_callback(100)
@@ -204,3 +669,17 @@ class TranslationService:
 
 # 单例模式
 translation_service = TranslationService()
+atexit.register(translation_service.shutdown_pool)
+
+
+if __name__ == "__main__":
+    # 预加载命令：在worker启动前下载/检查语言包并加载模型
+    # 用法: python -m services.translation_service [--offline]
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="预加载翻译语言包和模型")
+    parser.add_argument("--offline", action="store_true", help="只检查已安装的语言包，不访问网络")
+    args = parser.parse_args()
+    if args.offline:
+        translation_service.offline = True
+    translation_service.warmup()
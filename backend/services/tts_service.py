@@ -1,8 +1,13 @@
 from gtts import gTTS
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import json
 import os
 import sys
+import threading
+import time
 import requests
-from typing import Optional, Callable
+from typing import Optional, Callable, Dict, List
 from functools import wraps
 import signal
 
@@ -11,6 +16,16 @@ backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__
 sys.path.insert(0, backend_dir)
 
 from config import settings
+from services.audio_store import AudioChunkStore, create_audio_chunk_store, link_file, make_assembly_key, make_chunk_key
+from services.metrics import TTS_CHUNK_LOOKUPS, TTS_CHUNK_SECONDS, TTS_MERGE_SECONDS, timed
+from services.mp3_utils import concat_mp3_files, copy_range, find_audio_range, silence_frames
+from services.segmentation import iter_segments
+
+
+# 段落之间的静音时长（毫秒），合并文件和流式输出保持一致
+STREAM_GAP_MS = 500
+# 流式输出时每次读取的块大小
+STREAM_BLOCK_SIZE = 64 * 1024
 
 
 class TimeoutError(Exception):
@@ -21,11 +36,31 @@ def timeout_handler(signum, frame):
     raise TimeoutError("Operation timed out")
 
 
+class GTTSSynthesizer:
+    """基于gTTS的语音合成器"""
+    
+    def __init__(self, tld: Optional[str] = None, slow: Optional[bool] = None):
+        self.tld = tld or settings.tts_tld
+        self.slow = settings.tts_slow if slow is None else slow
+        # 影响合成结果的参数（口音、语速），作为chunk存储key的一部分
+        self.voice = f"gtts:{self.tld}:{'slow' if self.slow else 'normal'}"
+    
+    def synthesize(self, text: str, lang: str, output_path: str):
+        tts = gTTS(text=text, lang=lang, tld=self.tld, slow=self.slow)
+        tts.save(output_path)
+
+
 class TTSService:
-    def __init__(self):
+    def __init__(self, synthesizer=None, chunk_store: Optional[AudioChunkStore] = None):
         self.audio_storage_path = os.path.abspath("./storage/audio")
         # 确保存储目录存在
         os.makedirs(self.audio_storage_path, exist_ok=True)
+        # 语音合成器，需提供 synthesize(text, lang, output_path)，测试时可替换为本地实现；
+        # 可选的 voice 属性描述音色/语速，不同voice的合成结果分开缓存
+        self.synthesizer = synthesizer or GTTSSynthesizer()
+        # 按内容寻址的chunk存储，相同文本只合成一次
+        self.chunk_store = chunk_store or create_audio_chunk_store()
+        self._manifest_lock = threading.Lock()
     
     def text_to_speech(self, text: str, article_id: str, lang: str = "zh", progress_callback: Optional[Callable[[int], None]] = None) -> str:
         """
@@ -44,134 +79,399 @@ class TTSService:
         try:
             # gTTS单次处理的最大字符数约为5000
             max_chunk_length = 5000
+            if progress_callback:
+                progress_callback(10)  # 开始处理
             
             if len(text) <= max_chunk_length:
-                # 短文本直接生成
-                if progress_callback:
-                    progress_callback(50)  # 开始生成
-                
-                audio_path = os.path.join(self.audio_storage_path, f"{article_id}.mp3")
+                # 短文本整体作为一个chunk
                 print(f"Generating audio for article {article_id} (short text, {len(text)} chars)...")
-                
-                try:
-                    tts = gTTS(text=text, lang=lang, slow=False)
-                    tts.save(audio_path)
-                    print(f"✓ Audio generated successfully: {audio_path}")
-                except Exception as e:
-                    print(f"✗ Error generating audio: {e}")
-                    raise
-                
-                if progress_callback:
-                    progress_callback(100)  # 完成
-                
-                return audio_path
+                chunks = [text]
             else:
                 # 长文本分段生成
-                if progress_callback:
-                    progress_callback(10)  # 开始处理
-                
-                # 按段落分割
-                paragraphs = text.split('\n\n')
-                audio_files = []
-                
-                for i, para in enumerate(paragraphs):
-                    if not para.strip():
-                        continue
-                    
-                    # 如果段落太长，按句子分割
-                    if len(para) > max_chunk_length:
-                        sentences = para.split('. ')
-                        current_chunk = []
-                        current_length = 0
-                        
-                        for sentence in sentences:
-                            sentence = sentence.strip()
-                            if not sentence:
-                                continue
-                            sentence_length = len(sentence)
-                            
-                            if current_length + sentence_length > max_chunk_length:
-                                if current_chunk:
-                                    chunk_text = '. '.join(current_chunk)
-                                    chunk_audio = self._generate_chunk(chunk_text, f"{article_id}_chunk_{len(audio_files)}", lang)
-                                    audio_files.append(chunk_audio)
-                                
-                                current_chunk = [sentence]
-                                current_length = sentence_length
-                            else:
-                                current_chunk.append(sentence)
-                                current_length += sentence_length
-                        
-                        # 处理最后一个chunk
-                        if current_chunk:
-                            chunk_text = '. '.join(current_chunk)
-                            chunk_audio = self._generate_chunk(chunk_text, f"{article_id}_chunk_{len(audio_files)}", lang)
-                            audio_files.append(chunk_audio)
-                    else:
-                        chunk_audio = self._generate_chunk(para, f"{article_id}_chunk_{len(audio_files)}", lang)
-                        audio_files.append(chunk_audio)
-                    
-                    # 更新进度
-                    if progress_callback:
-                        progress = 10 + int((i + 1) / len(paragraphs) * 80)
-                        progress_callback(min(progress, 90))
+                chunks = self._split_chunks(text, max_chunk_length, lang)
+            keys = [self._chunk_key(chunk, lang) for chunk in chunks]
+            
+            # 引用本次用到的chunk，生成期间不会被淘汰
+            self.chunk_store.acquire(article_id, keys)
+            try:
+                manifest = self._start_manifest(article_id, [self.chunk_store.path_for(key) for key in keys])
+                # 存储中已有的chunk（其他文章的相同文本、上次中断前已完成的chunk）不再合成；
+                # 已被淘汰但文本未改变的chunk从上一次的合并文件中截取
+                cached = self.chunk_store.lookup(keys)
+                unique_keys = len(set(keys))
+                TTS_CHUNK_LOOKUPS.labels(result="hit").inc(len(cached))
+                TTS_CHUNK_LOOKUPS.labels(result="miss").inc(unique_keys - len(cached))
+                cached.update(self._reuse_chunks(keys, article_id, skip=cached))
+                audio_files = self._synthesize_chunks(chunks, keys, article_id, lang, progress_callback, manifest, cached=cached)
                 
                 # 合并音频文件
                 if progress_callback:
                     progress_callback(95)  # 开始合并
                 
-                final_audio_path = self._merge_audio_files(audio_files, article_id)
-                
-                # 清理临时文件
-                for temp_file in audio_files:
-                    try:
-                        if os.path.exists(temp_file):
-                            os.remove(temp_file)
-                    except:
-                        pass
+                # 合并文件将被覆盖，先删除旧的chunk索引（合成失败时旧索引仍可用）
+                self._remove_file(self._chunk_index_path(article_id))
+                final_audio_path, offsets = self._assemble(audio_files, keys, article_id)
+                if offsets is not None:
+                    self._write_chunk_index(article_id, final_audio_path, keys, offsets)
                 
-                if progress_callback:
-                    progress_callback(100)  # 完成
-                
-                return final_audio_path
+                # 记录合并结果，正在收听的客户端可以切换到合并文件继续读取
+                manifest["complete"] = True
+                manifest["final_path"] = final_audio_path
+                manifest["offsets"] = offsets
+                self._write_manifest(article_id, manifest)
+            finally:
+                self.chunk_store.release(article_id)
+            
+            print(f"✓ Audio generated successfully: {final_audio_path}")
+            if progress_callback:
+                progress_callback(100)  # 完成
+            
+            return final_audio_path
                 
         except Exception as e:
             print(f"TTS error: {e}")
             import traceback
             traceback.print_exc()
+            self._write_manifest(article_id, {"failed": True})
             raise
     
-    def _generate_chunk(self, text: str, chunk_id: str, lang: str) -> str:
-        """生成单个chunk的音频"""
-        audio_path = os.path.join(self.audio_storage_path, f"{chunk_id}.mp3")
-        tts = gTTS(text=text, lang=lang, slow=False)
-        tts.save(audio_path)
-        return audio_path
+    def _split_chunks(self, text: str, max_chunk_length: int, lang: Optional[str] = None) -> List[str]:
+        """按段落拆分文本，过长段落按句子边界（含中文句末标点）切成长度均衡、不超过max_chunk_length的块"""
+        return [piece for _, piece in iter_segments(text, max_chunk_length, lang=lang, paragraph_separator='\n\n')]
+    
+    def _synthesize_chunks(self, chunks: List[str], keys: List[str], article_id: str, lang: str, progress_callback: Optional[Callable[[int], None]] = None, manifest: Optional[dict] = None, cached: Optional[Dict[str, str]] = None) -> List[str]:
+        """
+        并发合成chunk存储中还没有的chunk，返回按原顺序排列的音频文件路径
+        并发数由 settings.tts_concurrency 控制（合成是网络I/O，线程池即可）
+        manifest: 每完成一个chunk就记录到清单，供流式播放读取
+        cached: 存储中已有的chunk {key: 文件路径}，不再合成
+        每个chunk完成后立即存入chunk存储，任务失败重试时已完成的chunk直接命中
+        """
+        paths = dict(cached or {})
+        # 同一篇文章中文本相同的chunk只合成一次
+        pending = {}
+        for key, chunk in zip(keys, chunks):
+            if key not in paths:
+                pending.setdefault(key, chunk)
+        
+        def mark_done(key: str):
+            if manifest is not None:
+                for index, chunk_key in enumerate(keys):
+                    if chunk_key == key:
+                        manifest["done"][index] = True
+        
+        for key in paths:
+            mark_done(key)
+        if paths and manifest is not None:
+            self._write_manifest(article_id, manifest)
+        
+        total = len(set(keys))
+        max_workers = max(1, min(settings.tts_concurrency, len(pending) or 1))
+        print(f"Generating {len(pending)}/{total} audio chunks for article {article_id} with {max_workers} workers...")
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._generate_chunk, chunk, key, lang): key
+                for key, chunk in pending.items()
+            }
+            try:
+                for completed, future in enumerate(as_completed(futures), total - len(pending) + 1):
+                    key = futures[future]
+                    paths[key] = future.result()
+                    mark_done(key)
+                    if manifest is not None:
+                        self._write_manifest(article_id, manifest)
+                    
+                    # 更新进度
+                    if progress_callback:
+                        progress = 10 + int(completed / total * 80)
+                        progress_callback(min(progress, 90))
+            except Exception:
+                # 某个chunk重试后仍失败：取消未开始的chunk；已完成的chunk已在存储中，重试时直接复用
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+        
+        return [paths[key] for key in keys]
+    
+    def _synthesize_with_retry(self, text: str, lang: str, audio_path: str):
+        """调用合成器生成音频，失败时按指数退避重试"""
+        max_retries = settings.tts_max_retries
+        for attempt in range(max_retries + 1):
+            try:
+                self.synthesizer.synthesize(text, lang, audio_path)
+                return
+            except Exception as e:
+                if attempt >= max_retries:
+                    raise
+                delay = settings.tts_retry_backoff * (2 ** attempt)
+                print(f"TTS request failed ({e}), retrying in {delay:.1f}s ({attempt + 1}/{max_retries})...")
+                time.sleep(delay)
+    
+    def _generate_chunk(self, text: str, key: str, lang: str) -> str:
+        """生成单个chunk的音频并存入chunk存储，返回存储路径"""
+        temp_path = self.chunk_store.temp_path_for(key)
+        os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+        try:
+            with timed(TTS_CHUNK_SECONDS):
+                self._synthesize_with_retry(text, lang, temp_path)
+            return self.chunk_store.put(key, temp_path)
+        finally:
+            self._remove_file(temp_path)
     
-    def _merge_audio_files(self, audio_files: list, article_id: str) -> str:
-        """合并多个音频文件"""
+    def _remove_file(self, path: Optional[str]):
+        """删除临时文件（忽略错误）"""
+        try:
+            if path and os.path.exists(path):
+                os.remove(path)
+        except:
+            pass
+    
+    def _assemble(self, audio_files: List[str], keys: List[str], article_id: str) -> tuple:
+        """
+        由chunk生成文章的音频文件 {article_id}.mp3，与已有文件内容相同时以硬链接共用数据：
+        单个chunk直接链接到存储中的chunk；内容相同（chunk序列一致）的合并文件链接到已有的合并文件
+        返回 (文件路径, 各chunk在文件中的 (偏移, 长度)，未知时为None)
+        """
+        final_path = os.path.join(self.audio_storage_path, f"{article_id}.mp3")
+        if len(audio_files) == 1:
+            with timed(TTS_MERGE_SECONDS, method="link"):
+                link_file(audio_files[0], final_path)
+            return final_path, None
+        
+        assembly_key = make_assembly_key(keys, STREAM_GAP_MS)
+        existing = self.chunk_store.find_assembly(assembly_key)
+        if existing is not None:
+            print(f"Audio for article {article_id} matches {existing['path']}, linking")
+            with timed(TTS_MERGE_SECONDS, method="link"):
+                link_file(existing["path"], final_path)
+            return final_path, existing["offsets"]
+        
+        started = time.perf_counter()
+        final_path, offsets = self._merge_audio_files(audio_files, article_id)
+        TTS_MERGE_SECONDS.labels(method="concat" if offsets is not None else "decode").observe(time.perf_counter() - started)
+        if offsets is not None:
+            self.chunk_store.record_assembly(assembly_key, final_path, offsets)
+        return final_path, offsets
+    
+    def _merge_audio_files(self, audio_files: list, article_id: str) -> tuple:
+        """
+        合并多个音频文件：格式一致时按帧直接拼接，否则回退到解码后重新编码
+        返回 (合并后的文件路径, 各chunk在合并文件中的 (偏移, 长度)，解码合并时为None)
+        """
+        final_path = os.path.join(self.audio_storage_path, f"{article_id}.mp3")
+        existing_files = [f for f in audio_files if f and os.path.exists(f)]
+        try:
+            # 段落间隔0.5秒静音
+            offsets = concat_mp3_files(existing_files, final_path, gap_ms=STREAM_GAP_MS)
+            if offsets is not None:
+                return final_path, offsets
+            print("Audio chunk formats differ, falling back to decoding merge")
+        except Exception as e:
+            print(f"Error concatenating audio frames: {e}, falling back to decoding merge")
+        
         try:
             from pydub import AudioSegment
             
             combined = AudioSegment.empty()
-            for audio_file in audio_files:
-                if os.path.exists(audio_file):
-                    audio = AudioSegment.from_mp3(audio_file)
-                    combined += audio
-                    # 添加短暂静音作为段落间隔
-                    combined += AudioSegment.silent(duration=500)  # 0.5秒静音
+            for audio_file in existing_files:
+                audio = AudioSegment.from_mp3(audio_file)
+                combined += audio
+                # 添加短暂静音作为段落间隔
+                combined += AudioSegment.silent(duration=STREAM_GAP_MS)  # 0.5秒静音
             
-            final_path = os.path.join(self.audio_storage_path, f"{article_id}.mp3")
-            combined.export(final_path, format="mp3")
-            return final_path
+            # 先写临时文件再替换：合并文件可能与其他文章的音频共用数据（硬链接），不能原地改写
+            temp_path = f"{final_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            combined.export(temp_path, format="mp3")
+            os.replace(temp_path, final_path)
+            return final_path, None
         except ImportError:
-            # 如果没有pydub，只返回第一个文件
+            # 如果没有pydub，只使用第一个文件
             print("Warning: pydub not installed, using first chunk only")
-            return audio_files[0] if audio_files else None
         except Exception as e:
+            # 如果合并失败，使用第一个文件
             print(f"Error merging audio: {e}")
-            # 如果合并失败，返回第一个文件
-            return audio_files[0] if audio_files else None
+        if not existing_files:
+            return None, None
+        link_file(existing_files[0], final_path)
+        return final_path, None
+    
+    def _chunk_key(self, text: str, lang: str) -> str:
+        """chunk的内容地址：文本、语言和合成器音色相同的chunk可以复用"""
+        voice = getattr(self.synthesizer, "voice", type(self.synthesizer).__name__)
+        return make_chunk_key(text, lang, voice)
+    
+    def _chunk_index_path(self, article_id: str) -> str:
+        return os.path.join(self.audio_storage_path, f"{article_id}.chunks.json")
+    
+    def _write_chunk_index(self, article_id: str, final_path: str, keys: List[str], offsets: list):
+        """记录合并文件中每个chunk的文本摘要和 (偏移, 长度)，供下次重新生成时复用"""
+        index = {
+            "final_path": final_path,
+            "size": os.path.getsize(final_path),
+            "chunks": [{"key": key, "offset": offset, "length": length} for key, (offset, length) in zip(keys, offsets)],
+        }
+        path = self._chunk_index_path(article_id)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(temp_path, path)
+    
+    def _reuse_chunks(self, keys: List[str], article_id: str, skip: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        从上一次生成的合并文件中截取文本未改变、但已不在chunk存储中的chunk，存回chunk存储
+        合并文件在索引写入后被改动过（大小不一致）时不复用
+        skip: 存储中已有的chunk，不再截取
+        返回 {key: chunk文件路径}
+        """
+        try:
+            with open(self._chunk_index_path(article_id), encoding='utf-8') as f:
+                index = json.load(f)
+            final_path = index["final_path"]
+            if os.path.getsize(final_path) != index["size"]:
+                return {}
+        except (OSError, ValueError, KeyError):
+            return {}
+        
+        ranges = {entry["key"]: (entry["offset"], entry["length"]) for entry in index["chunks"]}
+        reused = {}
+        try:
+            with open(final_path, 'rb') as src:
+                for key in dict.fromkeys(keys):
+                    if (skip and key in skip) or key not in ranges:
+                        continue
+                    offset, length = ranges[key]
+                    temp_path = self.chunk_store.temp_path_for(key)
+                    os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+                    with open(temp_path, 'wb') as dst:
+                        copy_range(src, dst, offset, offset + length)
+                    reused[key] = self.chunk_store.put(key, temp_path)
+        except OSError as e:
+            print(f"Error reusing audio chunks: {e}")
+        if reused:
+            print(f"Reusing {len(reused)} audio chunks from previous audio of article {article_id}")
+        return reused
+    
+    def _manifest_path(self, article_id: str) -> str:
+        return os.path.join(self.audio_storage_path, f"{article_id}.manifest.json")
+    
+    def read_manifest(self, article_id: str) -> Optional[dict]:
+        """读取音频生成清单，不存在时返回None"""
+        try:
+            with open(self._manifest_path(article_id), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+    
+    def _write_manifest(self, article_id: str, manifest: dict):
+        """原子写入音频生成清单（先写临时文件再替换）"""
+        path = self._manifest_path(article_id)
+        with self._manifest_lock:
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            os.replace(temp_path, path)
+    
+    def _start_manifest(self, article_id: str, chunk_paths: List[str]) -> dict:
+        """开始生成时写入清单：记录chunk总数和各chunk文件路径"""
+        manifest = {
+            "total": len(chunk_paths),
+            "chunks": chunk_paths,
+            "done": [False] * len(chunk_paths),
+            "complete": False,
+            "final_path": None,
+            "offsets": None,
+        }
+        self._write_manifest(article_id, manifest)
+        return manifest
+    
+    def reset_manifest(self, article_id: str):
+        """音频生成排队时调用：清掉上一次的清单，流式播放等待新的生成开始"""
+        self._write_manifest(article_id, {"total": None})
+    
+    def _iter_file(self, path: str, start: int = 0, end: Optional[int] = None):
+        """分块读取文件的 [start, end) 范围"""
+        with open(path, 'rb') as f:
+            if end is None:
+                end = os.fstat(f.fileno()).st_size
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                block = f.read(min(STREAM_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                yield block
+    
+    async def _aiter_file(self, path: str, start: int = 0, end: Optional[int] = None):
+        """_iter_file 的异步版本：每次读取在线程池中执行，不阻塞事件循环"""
+        blocks = self._iter_file(path, start, end)
+        while True:
+            block = await asyncio.to_thread(next, blocks, None)
+            if block is None:
+                return
+            yield block
+    
+    async def stream_audio(self, article_id: str):
+        """
+        边合成边输出音频：按顺序输出已经合成完成的chunk（chunk之间插入与合并文件相同的静音），
+        合成结束后如果chunk文件已被清理，则从合并文件的对应偏移继续输出
+        没有清单时（旧的音频）直接输出完整文件
+        """
+        final_path = os.path.join(self.audio_storage_path, f"{article_id}.mp3")
+        sent = 0
+        waited = 0.0
+        while True:
+            # 文件读取都在线程池中执行，该生成器运行在API的事件循环上
+            manifest = await asyncio.to_thread(self.read_manifest, article_id)
+            if manifest is None:
+                if sent == 0 and await asyncio.to_thread(os.path.exists, final_path):
+                    async for block in self._aiter_file(final_path):
+                        yield block
+                return
+            if manifest.get("failed"):
+                return
+            
+            total = manifest.get("total")
+            if (total is not None and sent < total and manifest["done"][sent]
+                    and await asyncio.to_thread(os.path.exists, manifest["chunks"][sent])):
+                chunk_path = manifest["chunks"][sent]
+                try:
+                    audio_range = await asyncio.to_thread(find_audio_range, chunk_path)
+                    if audio_range is None:
+                        blocks = self._aiter_file(chunk_path)
+                        silence = b""
+                    else:
+                        start, end, header = audio_range
+                        blocks = self._aiter_file(chunk_path, start, end)
+                        silence = silence_frames(header, STREAM_GAP_MS)
+                    async for block in blocks:
+                        yield block
+                except FileNotFoundError:
+                    # chunk刚好在合并后被清理，重新读取清单切换到合并文件
+                    continue
+                if silence:
+                    yield silence
+                sent += 1
+                waited = 0.0
+                continue
+            
+            if manifest.get("complete"):
+                if total is not None and sent < total:
+                    offsets = manifest.get("offsets")
+                    final_path = manifest.get("final_path") or final_path
+                    if offsets:
+                        async for block in self._aiter_file(final_path, offsets[sent][0]):
+                            yield block
+                    elif sent == 0:
+                        async for block in self._aiter_file(final_path):
+                            yield block
+                return
+            
+            if waited >= settings.tts_stream_wait_timeout:
+                print(f"Audio stream for {article_id} timed out waiting for chunk {sent}")
+                return
+            await asyncio.sleep(settings.tts_stream_poll_interval)
+            waited += settings.tts_stream_poll_interval
 
 
 # 单例模式
@@ -1,10 +1,18 @@
 from celery import Celery
+from kombu import Queue
+from celery.signals import before_task_publish
+from datetime import datetime
 import sys
 import os
+import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import settings
 
+# 队列：翻译（CPU密集，prefork进程池）和音频（网络I/O，线程池），互不抢占worker
+TRANSLATION_QUEUE = "translation"
+AUDIO_QUEUE = "audio"
+
 celery_app = Celery(
     "news_platform",
     broker=settings.redis_url,
@@ -17,10 +25,55 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    # 任务执行完成后才确认消息：worker中途退出时任务重新投递，从检查点续做
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # 每个worker进程只预取一个任务，避免长任务占住其他已预取的消息
+    worker_prefetch_multiplier=1,
+    # 按任务类型路由到各自的队列
+    task_queues=(Queue(TRANSLATION_QUEUE), Queue(AUDIO_QUEUE)),
+    task_default_queue=TRANSLATION_QUEUE,
+    task_routes={
+        'tasks.tasks.process_text_task': {'queue': TRANSLATION_QUEUE},
+        'tasks.tasks.retranslate_article_task': {'queue': TRANSLATION_QUEUE},
+        'tasks.tasks.generate_audio_task': {'queue': AUDIO_QUEUE},
+    },
+    # 优先级（Redis中数值越小越优先）：交互提交的短文本先于批量回填执行
+    task_default_priority=settings.task_priority_default,
+    broker_transport_options={
+        'queue_order_strategy': 'priority',
+        'priority_steps': list(range(10)),
+        'sep': ':',
+        # 消息在确认前的可见超时，需长于最长任务耗时，否则 acks_late 的长任务会被重复投递
+        'visibility_timeout': settings.broker_visibility_timeout,
+    },
     # 自动发现任务
     imports=('tasks.tasks',),
 )
 
+
+def task_priority(text_length: int) -> int:
+    """交互提交的优先级：短文本最优先，长文本使用默认优先级"""
+    if text_length <= settings.task_interactive_max_chars:
+        return settings.task_priority_interactive
+    return settings.task_priority_default
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    """入队时记录时间，worker据此统计排队等待时间；延迟执行（countdown/eta）的任务从预定时间算起"""
+    if headers is None:
+        return
+    enqueued_at = time.time()
+    eta = headers.get("eta")
+    if eta:
+        try:
+            enqueued_at = max(enqueued_at, datetime.fromisoformat(eta).timestamp())
+        except (TypeError, ValueError):
+            pass
+    headers["enqueued_at"] = enqueued_at
+
+
 # 确保任务模块被导入
 from tasks import tasks  # noqa
 
@@ -1,21 +1,111 @@
 from celery import Task
-from sqlalchemy.orm import Session
+from celery.exceptions import Retry
+from celery.states import READY_STATES
+from celery.signals import task_postrun, task_prerun, worker_process_init, worker_process_shutdown, worker_ready
+from sqlalchemy.orm import Session, undefer_group
 import sys
 import os
+import time
 
 # 添加backend目录到路径
 backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, backend_dir)
 
 from tasks.celery_app import celery_app
-from app.database import SessionLocal
+from app.database import SessionLocal, engine
 from app import models
+from services.translation_cache import translation_checkpoint
 from services.translation_service import translation_service
 from services.tts_service import tts_service
+from services.events import publish_article_event, publish_task_event
+from services.progress import ProgressReporter
+from services.audio_jobs import (
+    claim_audio_job, get_audio_job, refresh_audio_job, release_audio_job, replace_audio_job, request_audio_rerun
+)
+from services import metrics
 from config import settings
 from datetime import datetime
 
 
+@worker_ready.connect
+def prepare_translation_packages(**kwargs):
+    """worker启动时检查（必要时下载）语言包，模型在各worker进程首次翻译时加载"""
+    if settings.translation_preload:
+        translation_service._ensure_ready()
+
+
+@worker_process_init.connect
+def reset_db_pool(**kwargs):
+    """prefork子进程不能复用父进程连接池中的连接，丢弃后在子进程中重新建立"""
+    engine.dispose(close=False)
+
+
+@worker_ready.connect
+def start_metrics_server(**kwargs):
+    """worker主进程启动指标HTTP服务；prefork子进程的指标需要设置 PROMETHEUS_MULTIPROC_DIR 汇总"""
+    if not settings.metrics_worker_port:
+        return
+    try:
+        if metrics.start_http_server(settings.metrics_worker_port):
+            print(f"Worker metrics available on port {settings.metrics_worker_port}")
+    except OSError as e:
+        print(f"Error starting metrics server on port {settings.metrics_worker_port}: {e}")
+
+
+@worker_process_shutdown.connect
+def clean_process_metrics(pid=None, **kwargs):
+    metrics.mark_process_dead(pid or os.getpid())
+
+
+# 正在执行的任务的开始时间，key为task_id
+_task_started_at = {}
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    """记录排队等待时间（入队时间由 before_task_publish 写入消息头）"""
+    name = task.name.rsplit(".", 1)[-1]
+    enqueued_at = getattr(task.request, "enqueued_at", None)
+    if enqueued_at:
+        metrics.TASK_QUEUE_WAIT_SECONDS.labels(task=name).observe(max(0.0, time.time() - enqueued_at))
+    _task_started_at[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def record_task_duration(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started_at.pop(task_id, None)
+    if started is not None:
+        metrics.TASK_DURATION_SECONDS.labels(task=task.name.rsplit(".", 1)[-1], state=state or "UNKNOWN").observe(
+            time.perf_counter() - started
+        )
+
+
+def publish_article(article, **fields):
+    """推送文章状态/进度事件"""
+    publish_article_event(
+        article.id,
+        article.task_id,
+        status=article.status,
+        translation_progress=article.translation_progress,
+        **fields
+    )
+
+
+def publish_task(task):
+    """推送任务状态事件"""
+    publish_task_event(
+        task.id,
+        status=task.status,
+        articles_count=task.articles_count,
+        error_message=task.error_message
+    )
+
+
+def retry_countdown(retries: int) -> float:
+    """任务重试前的等待时间（秒），按重试次数指数增长"""
+    return settings.task_retry_backoff * (2 ** retries)
+
+
 def get_db_session():
     db = SessionLocal()
     try:
@@ -26,95 +116,114 @@ def get_db_session():
 
 @celery_app.task(bind=True)
 def process_text_task(self, task_id: str, title: str, content: str):
-    """处理文本输入任务"""
+    """处理文本输入任务
+    
+    可以重复执行：任务重试或worker中途退出后重新投递时沿用已创建的文章，
+    翻译从检查点续做；重试次数用完后文章和任务标记为失败
+    """
     db = get_db_session()
+    article = None
     try:
         # 更新任务状态
         task = db.query(models.Task).filter(models.Task.id == task_id).first()
         if not task:
             return {"status": "error", "message": "Task not found"}
         
+        article = db.query(models.Article).filter(models.Article.task_id == task_id).first()
+        if article is not None and article.status == "completed":
+            # 上一次执行已完成（例如完成后、确认消息前worker退出）
+            if task.status != "completed":
+                task.status = "completed"
+                db.commit()
+                publish_task(task)
+            return {"status": "completed", "articles_count": 1}
+        
         task.status = "translating"
         task.articles_count = 1
+        task.error_message = None
         db.commit()
+        publish_task(task)
         
-        # 创建文章记录
-        article = models.Article(
-            task_id=task_id,
-            title=title,
-            content=content,
-            source_url="text_input",
-            publish_time=datetime.now(),
-            author=None,
-            status="translating",
-            translation_progress=0,
-            translation_started_at=datetime.now()
-        )
-        db.add(article)
+        if article is None:
+            # 创建文章记录
+            article = models.Article(
+                task_id=task_id,
+                title=title,
+                content=content,
+                source_url="text_input",
+                publish_time=datetime.now(),
+                author=None,
+                status="translating",
+                translation_progress=0,
+                translation_started_at=datetime.now()
+            )
+            db.add(article)
+        else:
+            print(f"Resuming article {article.id} for task {task_id}")
+            article.status = "translating"
         db.commit()
         db.refresh(article)
+        publish_article(article)
         
-        # 定义进度回调函数
-        def update_progress(progress: int):
-            """更新翻译进度 (0-100)"""
-            try:
-                # 重新获取数据库会话（避免会话问题）
-                article_update = db.query(models.Article).filter(models.Article.id == article.id).first()
-                if article_update:
-                    article_update.translation_progress = progress
-                    db.commit()
-                    print(f"Translation progress: {progress}%")
-            except Exception as e:
-                print(f"Error updating progress: {e}")
-        
-        # 翻译文章
-        try:
-            title_cn, content_cn = translation_service.translate_article(title, content, progress_callback=update_progress)
-            article.title_cn = title_cn
-            article.content_cn = content_cn
-            article.translation_progress = 100
-            article.translation_completed_at = datetime.now()
-            # 翻译完成后直接标记为完成
-            article.status = "completed"
+        def save_progress_checkpoint(progress: int):
+            """稀疏写入翻译进度检查点（实时进度在Redis中）"""
+            db.query(models.Article).filter(models.Article.id == article.id).update(
+                {models.Article.translation_progress: progress}, synchronize_session=False
+            )
             db.commit()
+        
+        # 进度回调：实时进度写Redis并推送，数据库只写检查点
+        update_progress = ProgressReporter(article.id, task_id, "translating", checkpoint=save_progress_checkpoint)
+        
+        # 翻译文章：已完成的片段写入检查点，失败时按指数退避重试
+        try:
+            title_cn, content_cn = translation_service.translate_article(
+                title, content, progress_callback=update_progress, checkpoint_id=article.id
+            )
         except Exception as e:
-            import traceback
-            error_msg = f"{str(e)}\n{traceback.format_exc()}"
-            print(f"Error processing article {article.id}: {error_msg}")
-            # 即使翻译异常，也尝试保存已翻译的内容（如果有的话）
-            try:
-                # 如果翻译过程中出现异常，但部分内容已翻译，使用原文作为fallback
-                if not article.title_cn:
-                    article.title_cn = title
-                if not article.content_cn:
-                    article.content_cn = content
-                article.translation_completed_at = datetime.now()
-                # 标记为完成而不是失败（因为至少保存了原文）
-                article.status = "completed"
-                article.translation_progress = 100
-                db.commit()
-            except:
-                # 如果保存也失败，才标记为失败
-                article.status = "failed"
-                db.commit()
+            update_progress.finish()
+            if self.request.retries < settings.task_max_retries:
+                countdown = retry_countdown(self.request.retries)
+                print(f"Error translating article {article.id}, retrying in {countdown:.0f}s: {e}")
+                raise self.retry(exc=e, countdown=countdown, max_retries=settings.task_max_retries)
+            raise
         
-        # 更新任务状态为完成
+        article.title_cn = title_cn
+        article.content_cn = content_cn
+        article.translation_progress = 100
+        article.translation_completed_at = datetime.now()
+        # 翻译完成后直接标记为完成
+        article.status = "completed"
         task.status = "completed"
         db.commit()
+        # 译文已保存，删除检查点
+        translation_checkpoint(article.id).clear()
+        publish_article(article)
+        update_progress.finish()
+        publish_task(task)
         
         return {"status": "completed", "articles_count": 1}
         
+    except Retry:
+        raise
     except Exception as e:
         import traceback
         error_msg = f"{str(e)}\n{traceback.format_exc()}"
         print(f"Task error: {error_msg}")
-        # 更新任务状态为失败
+        # 重试次数用完：文章和任务标记为失败（不再用原文冒充译文）
         try:
+            db.rollback()
+            if article is not None:
+                article.status = "failed"
+                db.commit()
+                translation_checkpoint(article.id).clear()
+                publish_article(article, error=str(e)[:500])
             task = db.query(models.Task).filter(models.Task.id == task_id).first()
             if task:
                 task.status = "failed"
                 task.error_message = str(e)[:500]
                 db.commit()
+                publish_task(task)
         except:
             pass
         return {"status": "error", "message": str(e)}
@@ -125,14 +234,72 @@ def process_text_task(self, task_id: str, title: str, content: str):
             pass
 
 
+def _job_finished(job_id: str) -> bool:
+    """Celery结果中该任务是否已结束（结果后端不可用时按未结束处理）"""
+    try:
+        return celery_app.AsyncResult(job_id).state in READY_STATES
+    except Exception as e:
+        print(f"Error reading state of task {job_id}: {e}")
+        return False
+
+
+def _claim_audio_job(article_id: str, text_type: str, job_id: str):
+    """抢占音频生成锁，返回仍在进行的其他持有者ID（成功时返回None）"""
+    holder = claim_audio_job(article_id, text_type, job_id)
+    if holder is not None and _job_finished(holder):
+        # 持有者已结束但没有释放锁（例如worker被强制终止），由本任务接管
+        if replace_audio_job(article_id, text_type, holder, job_id):
+            print(f"Took over stale audio job {holder} for article {article_id} ({text_type})")
+            return None
+        holder = get_audio_job(article_id, text_type)
+    return holder
+
+
+def start_audio_generation(article_id: str, text_type: str, priority: int = None, rerun_if_running: bool = False):
+    """
+    单飞入队：该音频没有进行中的生成任务时入队新任务，已有时不重复入队
+    返回 (任务ID, 是否新入队)，重复请求拿到的是进行中任务的ID
+    
+    Args:
+        rerun_if_running: 文本已修改，进行中的任务结束后需要再生成一次
+    """
+    job_id = models.generate_uuid()
+    holder = _claim_audio_job(article_id, text_type, job_id)
+    if holder is not None:
+        if rerun_if_running:
+            request_audio_rerun(article_id, text_type)
+        return holder, False
+    
+    # 清掉上一次的生成清单，流式播放接口等待本次生成
+    suffix = "_original" if text_type == "original" else ""
+    tts_service.reset_manifest(f"{article_id}{suffix}")
+    try:
+        generate_audio_task.apply_async((article_id, text_type), task_id=job_id, priority=priority)
+    except Exception:
+        # 入队失败（例如消息队列不可用）时释放锁，否则在锁过期前该音频无法再生成
+        release_audio_job(article_id, text_type, job_id)
+        raise
+    return job_id, True
+
+
 @celery_app.task(bind=True)
 def generate_audio_task(self, article_id: str, text_type: str = "translated"):
     """生成音频任务
     
+    已合成的chunk存入chunk存储，失败时按指数退避重试，已完成的chunk直接复用
+    同一音频同一时间只有一个任务在生成：未经 start_audio_generation 入队的重复任务直接跳过
+    
     Args:
         article_id: 文章ID
         text_type: 文本类型，'original' 或 'translated'
     """
+    job_id = self.request.id
+    holder = _claim_audio_job(article_id, text_type, job_id)
+    if holder is not None:
+        print(f"Audio for article {article_id} ({text_type}) is already being generated by {holder}, skipping")
+        return {"status": "duplicate", "job_id": holder, "text_type": text_type}
+    
+    finished = True
     db = get_db_session()
     try:
         article = db.query(models.Article).filter(models.Article.id == article_id).first()
@@ -156,19 +323,24 @@ def generate_audio_task(self, article_id: str, text_type: str = "translated"):
         # 更新文章状态为生成中
         article.status = "generating"
         db.commit()
+        publish_article(article, text_type=text_type)
         
-        # 定义进度回调函数
-        def update_progress(progress: int):
-            """更新音频生成进度 (0-100)"""
-            try:
-                article_update = db.query(models.Article).filter(models.Article.id == article_id).first()
-                if article_update:
-                    # 使用translation_progress字段存储音频生成进度（临时）
-                    article_update.translation_progress = progress
-                    db.commit()
-                    print(f"Audio generation progress: {progress}%")
-            except Exception as e:
-                print(f"Error updating audio progress: {e}")
+        def save_progress_checkpoint(progress: int):
+            """稀疏写入音频生成进度检查点（使用translation_progress字段存储，临时）"""
+            db.query(models.Article).filter(models.Article.id == article_id).update(
+                {models.Article.translation_progress: progress}, synchronize_session=False
+            )
+            db.commit()
+            # 长文本生成时间可能超过锁的过期时间，随检查点续期
+            refresh_audio_job(article_id, text_type, job_id)
+        
+        # 进度回调：实时进度写Redis并推送，数据库只写检查点
+        update_progress = ProgressReporter(
+            article_id, article.task_id, "generating",
+            checkpoint=save_progress_checkpoint, text_type=text_type
+        )
+        
+        audio_id = f"{article_id}{audio_filename_suffix}"
         
         # 生成音频
         try:
@@ -177,7 +349,7 @@ def generate_audio_task(self, article_id: str, text_type: str = "translated"):
             
             audio_path = tts_service.text_to_speech(
                 text_to_convert, 
-                f"{article_id}{audio_filename_suffix}", 
+                audio_id, 
                 lang=lang,
                 progress_callback=update_progress
             )
@@ -193,17 +365,35 @@ def generate_audio_task(self, article_id: str, text_type: str = "translated"):
             article.status = "completed"
             article.translation_progress = 100
             db.commit()
+            publish_article(
+                article,
+                text_type=text_type,
+                audio_path=article.audio_path,
+                audio_path_original=article.audio_path_original
+            )
+            update_progress.finish()
             return {"status": "completed", "audio_path": audio_path, "text_type": text_type}
         except Exception as e:
             import traceback
             error_msg = f"{str(e)}\n{traceback.format_exc()}"
             print(f"✗ Error generating audio for article {article_id}: {error_msg}")
+            if self.request.retries < settings.task_max_retries:
+                update_progress.finish()
+                countdown = retry_countdown(self.request.retries)
+                print(f"Retrying audio generation for article {article_id} in {countdown:.0f}s")
+                raise self.retry(exc=e, countdown=countdown, max_retries=settings.task_max_retries)
             # 即使音频生成失败，也标记为完成（因为翻译已完成）
             article.status = "completed"
             article.translation_progress = 0  # 重置进度
             db.commit()
+            publish_article(article, text_type=text_type, error=str(e)[:500])
+            update_progress.finish()
             return {"status": "error", "message": str(e)}
         
+    except Retry:
+        # 重试沿用同一任务ID，继续持有锁
+        finished = False
+        raise
     except Exception as e:
         import traceback
         error_msg = f"{str(e)}\n{traceback.format_exc()}"
@@ -214,3 +404,104 @@ def generate_audio_task(self, article_id: str, text_type: str = "translated"):
             db.close()
         except:
             pass
+        if finished and release_audio_job(article_id, text_type, job_id):
+            # 生成期间文本被修改，用新文本再生成一次
+            start_audio_generation(article_id, text_type)
+
+
+@celery_app.task(bind=True)
+def retranslate_article_task(self, article_id: str, title: str, content: str, previous_status: str = None):
+    """文章内容更新后增量重新翻译
+    
+    只翻译改变的行并拼接到原译文中；已生成过的音频随后重新生成，
+    文本未改变的音频chunk从旧音频中复用
+    失败时按指数退避重试，已翻译的片段从检查点续用
+    
+    Args:
+        previous_status: 接口入队前已把状态置为翻译中，这里是之前的状态，最终失败时恢复
+    """
+    db = get_db_session()
+    try:
+        article = db.query(models.Article).options(undefer_group("body")).filter(models.Article.id == article_id).first()
+        if not article:
+            return {"status": "error", "message": "Article not found"}
+        
+        old_title, old_title_cn = article.title, article.title_cn
+        old_content, old_content_cn = article.content, article.content_cn
+        # 未传入时（旧版本接口入队的任务）：处于翻译中说明是重试或重新投递，此前的状态为已完成
+        if previous_status is None:
+            previous_status = "completed" if article.status == "translating" else article.status
+        
+        article.status = "translating"
+        article.translation_progress = 0
+        article.translation_started_at = datetime.now()
+        db.commit()
+        publish_article(article)
+        
+        def save_progress_checkpoint(progress: int):
+            """稀疏写入翻译进度检查点（实时进度在Redis中）"""
+            db.query(models.Article).filter(models.Article.id == article_id).update(
+                {models.Article.translation_progress: progress}, synchronize_session=False
+            )
+            db.commit()
+        
+        update_progress = ProgressReporter(article_id, article.task_id, "translating", checkpoint=save_progress_checkpoint)
+        
+        try:
+            title_cn, content_cn, changed_lines = translation_service.retranslate_article(
+                old_title, old_title_cn, old_content, old_content_cn,
+                title, content, progress_callback=update_progress, checkpoint_id=article_id
+            )
+        except Exception as e:
+            import traceback
+            print(f"Error retranslating article {article_id}: {e}\n{traceback.format_exc()}")
+            if self.request.retries < settings.task_max_retries:
+                update_progress.finish()
+                raise self.retry(exc=e, countdown=retry_countdown(self.request.retries), max_retries=settings.task_max_retries)
+            translation_checkpoint(article_id).clear()
+            # 保留原有内容和译文
+            article.status = previous_status
+            article.translation_progress = 100
+            db.commit()
+            publish_article(article, error=str(e)[:500])
+            update_progress.finish()
+            return {"status": "error", "message": str(e)}
+        
+        article.title = title
+        article.content = content
+        article.title_cn = title_cn
+        article.content_cn = content_cn
+        article.translation_progress = 100
+        article.translation_completed_at = datetime.now()
+        article.status = "completed"
+        db.commit()
+        translation_checkpoint(article_id).clear()
+        publish_article(article)
+        update_progress.finish()
+        
+        # 已生成过的音频重新生成（未改变的chunk会被复用）
+        regenerate = []
+        if article.audio_path and content_cn != old_content_cn:
+            regenerate.append("translated")
+        if article.audio_path_original and content != old_content:
+            regenerate.append("original")
+        for text_type in regenerate:
+            start_audio_generation(article_id, text_type, rerun_if_running=True)
+        
+        return {
+            "status": "completed",
+            "changed_lines": changed_lines,
+            "audio_regenerated": regenerate
+        }
+    except Retry:
+        raise
+    except Exception as e:
+        import traceback
+        error_msg = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Retranslation task error: {error_msg}")
+        return {"status": "error", "message": str(e)}
+    finally:
+        try:
+            db.close()
+        except:
+            pass
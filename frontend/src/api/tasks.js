@@ -13,10 +13,11 @@ export const getTask = async (taskId) => {
   return response.data;
 };
 
-export const getTasks = async (skip = 0, limit = 20) => {
-  const response = await client.get('/api/tasks', {
-    params: { skip, limit },
-  });
+// 传入上一页返回的 next_cursor 做游标分页；status 按任务状态过滤
+export const getTasks = async (skip = 0, limit = 20, { cursor, status } = {}) => {
+  const params = cursor ? { limit, cursor } : { skip, limit };
+  if (status) params.status = status;
+  const response = await client.get('/api/tasks', { params });
   return response.data;
 };
 
@@ -30,6 +31,17 @@ export const getArticle = async (articleId) => {
   return response.data;
 };
 
+// 提交文章的更正版本：只重新翻译改变的段落
+export const updateArticle = async (articleId, { title, content }) => {
+  const response = await client.put(`/api/articles/${articleId}`, { title, content });
+  return response.data;
+};
+
+export const getArticleStatus = async (articleId) => {
+  const response = await client.get(`/api/articles/${articleId}/status`);
+  return response.data;
+};
+
 export const downloadOriginal = async (articleId) => {
   const response = await client.get(`/api/articles/${articleId}/download/original`, {
     responseType: 'blob',
@@ -44,6 +56,16 @@ export const downloadTranslated = async (articleId) => {
   return response.data;
 };
 
+export const downloadArticlesZip = async (articleIds) => {
+  const response = await client.post('/api/articles/batch-download', {
+    article_ids: articleIds,
+    format: 'zip',
+  }, {
+    responseType: 'blob',
+  });
+  return response.data;
+};
+
 export const deleteAllTasks = async () => {
   const response = await client.delete('/api/tasks/all');
   return response.data;
@@ -64,3 +86,57 @@ export const downloadAudio = async (articleId, textType = 'translated') => {
   return response.data;
 };
 
+
+// 边生成边播放的音频地址，可直接用于 <audio src>
+export const getAudioStreamUrl = (articleId, textType = 'translated') => {
+  return `${client.defaults.baseURL}/api/articles/${articleId}/stream/audio?text_type=${textType}`;
+};
+
+// 已生成音频的地址（支持Range，可直接用于 <audio src> 并拖动进度）
+export const getAudioUrl = (articleId, textType = 'translated') => {
+  return `${client.defaults.baseURL}/api/articles/${articleId}/download/audio?text_type=${textType}`;
+};
+
+// 订阅服务端推送的状态/进度事件（Server-Sent Events）
+// 服务端不支持推送（Redis不可用）或连接失败时调用 onUnavailable，由页面回退到轮询
+// 返回取消订阅的函数
+export const subscribeEvents = (path, { onSnapshot, onEvent, onUnavailable }) => {
+  if (typeof EventSource === 'undefined') {
+    onUnavailable?.();
+    return () => {};
+  }
+
+  const source = new EventSource(`${client.defaults.baseURL}${path}`);
+  let closed = false;
+  const close = () => {
+    closed = true;
+    source.close();
+  };
+
+  source.addEventListener('snapshot', (e) => onSnapshot?.(JSON.parse(e.data)));
+  source.addEventListener('unavailable', () => {
+    close();
+    onUnavailable?.();
+  });
+  source.onmessage = (e) => onEvent?.(JSON.parse(e.data));
+  source.onerror = () => {
+    // 连接已彻底关闭（而不是浏览器自动重连中）时回退到轮询
+    if (!closed && source.readyState === EventSource.CLOSED) {
+      close();
+      onUnavailable?.();
+    }
+  };
+
+  return close;
+};
+
+// 批量创建任务：articles 为 [{ title, content }]
+export const createTaskBatch = async (articles) => {
+  const response = await client.post('/api/tasks/batch', { articles });
+  return response.data;
+};
+
+export const getTaskBatch = async (batchId) => {
+  const response = await client.get(`/api/tasks/batch/${batchId}`);
+  return response.data;
+};
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useParams, useNavigate, Link } from 'react-router-dom';
 import { motion } from 'framer-motion';
-import { getArticle, downloadOriginal, downloadTranslated } from '../api/tasks';
+import { getArticle, getArticleStatus, downloadOriginal, downloadTranslated, subscribeEvents, getAudioStreamUrl, getAudioUrl, updateArticle } from '../api/tasks';
 
 function ArticleDetail() {
   const { articleId } = useParams();
@@ -10,12 +10,57 @@ function ArticleDetail() {
   const [loading, setLoading] = useState(true);
   const [showOriginal, setShowOriginal] = useState(false);
   const [downloading, setDownloading] = useState({});
+  // 本页打开期间正在生成的音频类型：播放器使用边生成边播放的地址，生成完成后不切换地址以免打断播放
+  const [streamType, setStreamType] = useState(null);
+  // 编辑原文（例如通讯稿的更正版本）：提交后只重新翻译改变的行，音频随后重新生成
+  const [editing, setEditing] = useState(false);
+  const [editTitle, setEditTitle] = useState('');
+  const [editContent, setEditContent] = useState('');
+  const [saving, setSaving] = useState(false);
 
   useEffect(() => {
+    setStreamType(null);
+    setEditing(false);
     loadArticle();
-    // 如果正在翻译，每1秒刷新；否则每3秒刷新
-    const interval = setInterval(loadArticle, 1000);
-    return () => clearInterval(interval);
+    // 通过服务端推送接收状态和进度；推送不可用时回退到每3秒轮询
+    let interval = null;
+    const unsubscribe = subscribeEvents(`/api/articles/${articleId}/events`, {
+      onEvent: (event) => {
+        if (event.type !== 'article') return;
+        if (event.status === 'generating' && event.text_type) {
+          setStreamType(event.text_type);
+        }
+        setArticle((prev) => prev && {
+          ...prev,
+          status: event.status,
+          translation_progress: event.translation_progress,
+        });
+        // 进入终态时重新加载完整内容（译文、音频路径等）
+        if (event.status === 'completed' || event.status === 'failed') {
+          loadArticle();
+        }
+      },
+      onUnavailable: () => {
+        // 轮询只取状态和进度，进入终态后再加载完整内容
+        interval = setInterval(async () => {
+          try {
+            const status = await getArticleStatus(articleId);
+            setArticle((prev) => prev && { ...prev, ...status });
+            if (status.status === 'completed' || status.status === 'failed') {
+              clearInterval(interval);
+              interval = null;
+              loadArticle();
+            }
+          } catch (error) {
+            console.error('Failed to load article status:', error);
+          }
+        }, 3000);
+      },
+    });
+    return () => {
+      unsubscribe();
+      if (interval) clearInterval(interval);
+    };
   }, [articleId]);
   
   // 当文章状态改变时，调整刷新频率
@@ -24,6 +69,10 @@ function ArticleDetail() {
       // 已完成时，停止频繁刷新
       return;
     }
+    // 打开页面时已在生成（轮询/快照不带音频类型），默认按译文音频播放
+    if (article?.status === 'generating') {
+      setStreamType((prev) => prev || 'translated');
+    }
   }, [article?.status]);
 
   const loadArticle = async () => {
@@ -66,6 +115,41 @@ function ArticleDetail() {
     }
   };
 
+  const startEditing = () => {
+    setEditTitle(article.title || '');
+    setEditContent(article.content || '');
+    setEditing(true);
+  };
+
+  const handleSaveEdit = async (e) => {
+    e.preventDefault();
+    if (!editContent.trim()) return;
+    setSaving(true);
+    try {
+      await updateArticle(articleId, { title: editTitle.trim() || null, content: editContent });
+      setEditing(false);
+      // 重新翻译已入队，进度通过事件推送/轮询更新
+      setArticle((prev) => prev && { ...prev, status: 'translating', translation_progress: 0 });
+    } catch (error) {
+      alert('保存失败: ' + (error.response?.data?.detail || error.message));
+    } finally {
+      setSaving(false);
+    }
+  };
+
+  // 文章翻译或生成音频期间不能编辑（服务端返回409）
+  const editable = article && article.status !== 'translating' && article.status !== 'generating';
+
+  // 播放器地址：生成中用流式地址，否则用已生成的音频（优先当前显示的语言）
+  const getPlayerSource = () => {
+    if (streamType) return getAudioStreamUrl(articleId, streamType);
+    if (!article) return null;
+    if (showOriginal && article.audio_path_original) return getAudioUrl(articleId, 'original');
+    if (article.audio_path) return getAudioUrl(articleId, 'translated');
+    if (article.audio_path_original) return getAudioUrl(articleId, 'original');
+    return null;
+  };
+
   if (loading) {
     return (
       <div className="container mx-auto px-4 py-16">
@@ -101,6 +185,15 @@ function ArticleDetail() {
             >
               {showOriginal ? '显示中文' : '显示原文'}
             </button>
+            {!editing && (
+              <button
+                onClick={startEditing}
+                disabled={!editable}
+                className="px-4 py-2 bg-gray-700 text-white rounded-lg hover:bg-gray-600 disabled:opacity-50 transition-colors"
+              >
+                编辑原文
+              </button>
+            )}
           </div>
 
           <h1 className="text-3xl font-bold text-white mb-4">
@@ -143,6 +236,57 @@ function ArticleDetail() {
           )}
         </div>
 
+        {getPlayerSource() && (
+          <div className="mb-8">
+            <div className="flex items-center justify-between mb-2">
+              <span className="text-white font-medium">
+                {article.status === 'generating' ? '音频生成中，可边生成边播放' : '音频'}
+              </span>
+              {article.status === 'generating' && (
+                <span className="text-gray-400 text-sm">{article.translation_progress || 0}%</span>
+              )}
+            </div>
+            <audio key={getPlayerSource()} controls preload="none" src={getPlayerSource()} className="w-full" />
+          </div>
+        )}
+
+        {editing && (
+          <form onSubmit={handleSaveEdit} className="space-y-4 mb-8">
+            <input
+              type="text"
+              value={editTitle}
+              onChange={(e) => setEditTitle(e.target.value)}
+              placeholder="文章标题"
+              className="w-full px-6 py-4 bg-gray-900 text-white rounded-lg border border-gray-700 focus:outline-none focus:border-blue-500"
+              disabled={saving}
+            />
+            <textarea
+              value={editContent}
+              onChange={(e) => setEditContent(e.target.value)}
+              rows={16}
+              className="w-full px-6 py-4 bg-gray-900 text-white rounded-lg border border-gray-700 focus:outline-none focus:border-blue-500 resize-y"
+              disabled={saving}
+            />
+            <div className="flex gap-4">
+              <button
+                type="submit"
+                disabled={saving || !editContent.trim()}
+                className="px-6 py-3 bg-blue-600 text-white rounded-lg hover:bg-blue-700 disabled:opacity-50 transition-colors"
+              >
+                {saving ? '保存中...' : '保存并重新翻译'}
+              </button>
+              <button
+                type="button"
+                onClick={() => setEditing(false)}
+                disabled={saving}
+                className="px-6 py-3 bg-gray-700 text-white rounded-lg hover:bg-gray-600 disabled:opacity-50 transition-colors"
+              >
+                取消
+              </button>
+            </div>
+          </form>
+        )}
+
         <div className="prose prose-invert max-w-none mb-8">
           {article.status === 'translating' && !article.content_cn && (
             <div className="mb-4 p-4 bg-blue-900/30 border border-blue-500 rounded-lg text-blue-200">
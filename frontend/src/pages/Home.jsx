@@ -1,7 +1,19 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { motion } from 'framer-motion';
-import { createTask, getTasks, deleteAllTasks, getTaskArticles, downloadOriginal, downloadTranslated, generateAudio, downloadAudio } from '../api/tasks';
+import { createTask, createTaskBatch, getTaskBatch, getTasks, deleteAllTasks, getTaskArticles, downloadOriginal, downloadTranslated, generateAudio, downloadAudio, subscribeEvents } from '../api/tasks';
+
+// 批量模式：文章之间用单独一行 --- 分隔，多行文章的第一行作为标题
+const parseBatchArticles = (text) => text
+  .split(/^\s*---\s*$/m)
+  .map((chunk) => chunk.trim())
+  .filter(Boolean)
+  .map((chunk) => {
+    const lines = chunk.split('\n');
+    if (lines.length === 1) return { title: '', content: chunk };
+    return { title: lines[0].trim(), content: lines.slice(1).join('\n').trim() };
+  })
+  .filter((article) => article.content);
 
 function Home() {
   const [title, setTitle] = useState('');
@@ -13,22 +25,49 @@ function Home() {
   const [downloading, setDownloading] = useState({});
   const [generatingAudio, setGeneratingAudio] = useState({});
   const [hoverMenu, setHoverMenu] = useState({}); // { 'type-taskId-articleId': true/false }
+  const [batchMode, setBatchMode] = useState(false);
+  const [batchStatus, setBatchStatus] = useState(null); // 最近一次批量提交的进度
   const navigate = useNavigate();
 
   useEffect(() => {
     loadRecentTasks();
-    // 如果有正在生成音频的任务，每2秒刷新一次
-    const interval = setInterval(() => {
-      const hasGenerating = tasksWithArticles.some(task => {
-        const article = task.articles?.[0];
-        return article && article.status === 'generating';
-      });
-      if (hasGenerating) {
-        loadRecentTasks();
+    // 通过服务端推送得知任务/文章状态变化后刷新列表；推送不可用时回退到每3秒轮询
+    let interval = null;
+    let reloadTimer = null;
+    const unsubscribe = subscribeEvents('/api/events', {
+      onEvent: (event) => {
+        // 忽略中间进度事件，只在状态变化时刷新，并合并短时间内的多次刷新
+        const isProgressOnly = event.type === 'article'
+          && event.status !== 'completed'
+          && event.status !== 'failed'
+          && event.translation_progress > 0;
+        if (isProgressOnly) return;
+        clearTimeout(reloadTimer);
+        reloadTimer = setTimeout(loadRecentTasks, 500);
+      },
+      onUnavailable: () => {
+        interval = setInterval(loadRecentTasks, 3000);
+      },
+    });
+    return () => {
+      unsubscribe();
+      clearTimeout(reloadTimer);
+      if (interval) clearInterval(interval);
+    };
+  }, []);
+
+  // 轮询最近一次批量提交的进度，全部结束后停止
+  useEffect(() => {
+    if (!batchStatus || batchStatus.finished) return;
+    const interval = setInterval(async () => {
+      try {
+        setBatchStatus(await getTaskBatch(batchStatus.batch_id));
+      } catch (error) {
+        console.error('Failed to load batch status:', error);
       }
-    }, 2000);
+    }, 3000);
     return () => clearInterval(interval);
-  }, [tasksWithArticles.length]);
+  }, [batchStatus?.batch_id, batchStatus?.finished]);
 
   const loadRecentTasks = async () => {
     try {
@@ -68,6 +107,15 @@ function Home() {
 
     setLoading(true);
     try {
+      if (batchMode) {
+        const articles = parseBatchArticles(content);
+        if (articles.length === 0) return;
+        const batch = await createTaskBatch(articles);
+        setContent('');
+        setBatchStatus({ batch_id: batch.batch_id, total: batch.total, completed: 0, failed: 0, finished: false });
+        loadRecentTasks();
+        return;
+      }
       const task = await createTask(title, content);
       navigate(`/tasks/${task.task_id}`);
     } catch (error) {
@@ -183,29 +231,45 @@ function Home() {
 
         <form onSubmit={handleSubmit} className="mb-16">
           <div className="space-y-4">
-            <input
-              type="text"
-              value={title}
-              onChange={(e) => setTitle(e.target.value)}
-              placeholder="文章标题（可选）"
-              className="w-full px-6 py-4 bg-gray-800 text-white rounded-lg border border-gray-700 focus:outline-none focus:border-blue-500"
-              disabled={loading}
-            />
+            <label className="flex items-center gap-2 text-gray-300 text-sm">
+              <input
+                type="checkbox"
+                checked={batchMode}
+                onChange={(e) => setBatchMode(e.target.checked)}
+                disabled={loading}
+              />
+              批量提交（文章之间用单独一行 --- 分隔，每篇第一行为标题）
+            </label>
+            {!batchMode && (
+              <input
+                type="text"
+                value={title}
+                onChange={(e) => setTitle(e.target.value)}
+                placeholder="文章标题（可选）"
+                className="w-full px-6 py-4 bg-gray-800 text-white rounded-lg border border-gray-700 focus:outline-none focus:border-blue-500"
+                disabled={loading}
+              />
+            )}
             <textarea
               value={content}
               onChange={(e) => setContent(e.target.value)}
-              placeholder="输入文章内容..."
+              placeholder={batchMode ? '标题一\n正文一...\n---\n标题二\n正文二...' : '输入文章内容...'}
               rows={12}
               className="w-full px-6 py-4 bg-gray-800 text-white rounded-lg border border-gray-700 focus:outline-none focus:border-blue-500 resize-none"
               disabled={loading}
             />
-            <div className="flex justify-end">
+            <div className="flex items-center justify-between">
+              <span className="text-gray-400 text-sm">
+                {batchStatus && `批次进度：已完成 ${batchStatus.completed}/${batchStatus.total}`
+                  + (batchStatus.failed ? `，失败 ${batchStatus.failed}` : '')
+                  + (batchStatus.finished ? '（全部结束）' : '')}
+              </span>
               <button
                 type="submit"
                 disabled={loading || !content.trim()}
                 className="px-8 py-4 bg-blue-600 text-white rounded-lg hover:bg-blue-700 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
               >
-                {loading ? '处理中...' : '开始翻译'}
+                {loading ? '处理中...' : (batchMode ? '批量翻译' : '开始翻译')}
               </button>
             </div>
           </div>
@@ -319,7 +383,7 @@ function Home() {
                                       e.stopPropagation();
                                       handleDownload(task.task_id, article.id, 'translated');
                                     }}
-                                    disabled={downloading[`${task.task_id}-${article.id}-translated`] || !article.content_cn}
+                                    disabled={downloading[`${task.task_id}-${article.id}-translated`] || !article.has_translation}
                                     className="w-full text-left px-3 py-2 text-xs text-white hover:bg-gray-700 disabled:opacity-50 transition-colors border-t border-gray-700"
                                   >
                                     {downloading[`${task.task_id}-${article.id}-translated`] ? '下载中...' : '下载译文'}
@@ -405,7 +469,7 @@ function Home() {
                                           e.stopPropagation();
                                           handleGenerateAudio(task.task_id, article.id, 'original');
                                         }}
-                                        disabled={generatingAudio[`${task.task_id}-${article.id}-original`] || !article.content}
+                                        disabled={generatingAudio[`${task.task_id}-${article.id}-original`] || !article.has_content}
                                         className="w-full text-left px-3 py-2 text-xs text-white hover:bg-gray-700 disabled:opacity-50 transition-colors flex items-center gap-2"
                                       >
                                         {generatingAudio[`${task.task_id}-${article.id}-original`] && (
@@ -418,7 +482,7 @@ function Home() {
                                           e.stopPropagation();
                                           handleGenerateAudio(task.task_id, article.id, 'translated');
                                         }}
-                                        disabled={generatingAudio[`${task.task_id}-${article.id}-translated`] || !article.content_cn}
+                                        disabled={generatingAudio[`${task.task_id}-${article.id}-translated`] || !article.has_translation}
                                         className="w-full text-left px-3 py-2 text-xs text-white hover:bg-gray-700 disabled:opacity-50 transition-colors border-t border-gray-700 flex items-center gap-2"
                                       >
                                         {generatingAudio[`${task.task_id}-${article.id}-translated`] && (
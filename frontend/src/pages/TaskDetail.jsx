@@ -1,7 +1,7 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate, Link } from 'react-router-dom';
 import { motion } from 'framer-motion';
-import { getTask, getTaskArticles } from '../api/tasks';
+import { getTask, getTaskArticles, subscribeEvents, downloadArticlesZip } from '../api/tasks';
 
 function TaskDetail() {
   const { taskId } = useParams();
@@ -9,11 +9,49 @@ function TaskDetail() {
   const [task, setTask] = useState(null);
   const [articles, setArticles] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [downloadingZip, setDownloadingZip] = useState(false);
+  // 事件回调中读取当前文章列表（回调在订阅时创建，不能直接读 articles）
+  const articlesRef = useRef([]);
+
+  useEffect(() => {
+    articlesRef.current = articles;
+  }, [articles]);
 
   useEffect(() => {
     loadData();
-    const interval = setInterval(loadData, 3000); // 每3秒刷新一次
-    return () => clearInterval(interval);
+    // 通过服务端推送接收任务和文章状态；推送不可用时回退到每3秒轮询
+    let interval = null;
+    const unsubscribe = subscribeEvents(`/api/tasks/${taskId}/events`, {
+      onEvent: (event) => {
+        if (event.type === 'task') {
+          setTask((prev) => prev && {
+            ...prev,
+            status: event.status,
+            articles_count: event.articles_count,
+            error_message: event.error_message,
+          });
+        } else if (event.type === 'article') {
+          if (!articlesRef.current.some((article) => article.id === event.id)) {
+            // 新创建的文章，重新加载列表
+            loadData();
+            return;
+          }
+          setArticles((prev) => prev.map((article) => article.id === event.id
+            ? { ...article, status: event.status, translation_progress: event.translation_progress }
+            : article));
+        }
+        if (event.status === 'completed' || event.status === 'failed') {
+          loadData();
+        }
+      },
+      onUnavailable: () => {
+        interval = setInterval(loadData, 3000);
+      },
+    });
+    return () => {
+      unsubscribe();
+      if (interval) clearInterval(interval);
+    };
   }, [taskId]);
 
   const loadData = async () => {
@@ -31,6 +69,25 @@ function TaskDetail() {
     }
   };
 
+  const handleDownloadAll = async () => {
+    setDownloadingZip(true);
+    try {
+      const blob = await downloadArticlesZip(articles.map((article) => article.id));
+      const url = window.URL.createObjectURL(blob);
+      const a = document.createElement('a');
+      a.href = url;
+      a.download = `task_${taskId}.zip`;
+      document.body.appendChild(a);
+      a.click();
+      window.URL.revokeObjectURL(url);
+      document.body.removeChild(a);
+    } catch (error) {
+      alert('下载失败: ' + (error.response?.data?.detail || error.message));
+    } finally {
+      setDownloadingZip(false);
+    }
+  };
+
   const getStatusColor = (status) => {
     const colors = {
       pending: 'bg-yellow-500',
@@ -103,9 +160,20 @@ function TaskDetail() {
       </motion.div>
 
       <div>
-        <h2 className="text-2xl font-bold text-white mb-6">
-          文章列表 ({articles.length})
-        </h2>
+        <div className="flex items-center justify-between mb-6">
+          <h2 className="text-2xl font-bold text-white">
+            文章列表 ({articles.length})
+          </h2>
+          {articles.length > 0 && (
+            <button
+              onClick={handleDownloadAll}
+              disabled={downloadingZip}
+              className="px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 disabled:opacity-50 transition-colors"
+            >
+              {downloadingZip ? '打包中...' : '打包下载'}
+            </button>
+          )}
+        </div>
         <div className="space-y-4">
           {articles.map((article) => (
             <motion.div